@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from . import signals  # noqa: F401
+        from .dbcache import start_sweeper_thread
+        from .instrumentation import install_queue_logging
+        from .purchase_codes import get_key
+        # Sem chave secreta os códigos de compra seriam previsíveis: não sobe
+        get_key()
+        # A thread de varredura nasce na primeira requisição de cada processo servidor
+        request_started.connect(start_sweeper_thread, dispatch_uid='login-cache-sweeper')
+        install_queue_logging()
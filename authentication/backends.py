@@ -1,67 +1,164 @@
+import asyncio
+from asgiref.sync import sync_to_async
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import Group
+from django.db import IntegrityError
+from django.db.models import Case, CharField, Exists, F, OuterRef, Value, When
 from .models import CustomUser, Admin, Dealer
-from .utils import check_password, hash_password, is_valid_bcrypt_hash
+from .utils import check_password, hash_password, password_needs_rehash
+from .hash_pool import get_hash_pool
+from .user_cache import load_user
+from .instrumentation import auth_trace, set_outcome, timed
+
+# Grupos por nome, cacheados por processo (limpos pelos signals de Group)
+_group_cache = {}
+
+def get_cached_group(name):
+    """Retorna o Group pelo nome, criando-o na primeira vez"""
+    group = _group_cache.get(name)
+    if group is None:
+        group, created = Group.objects.get_or_create(name=name)
+        _group_cache[name] = group
+    return group
+
+def clear_group_cache():
+    _group_cache.clear()
+
+def get_principals(username):
+    """
+    Busca Admin e Dealer com o username em uma única query (UNION ALL).
+    Retorna pares (role, hash) com Admin antes de Dealer.
+    """
+    admins = Admin.objects.filter(admin_name=username).annotate(
+        role=Value('Admin', output_field=CharField()),
+        credential=F('passwd'),
+    ).values_list('role', 'credential')
+    dealers = Dealer.objects.filter(dealer_id=username).annotate(
+        role=Value('Dealer', output_field=CharField()),
+        credential=F('dlpasswd'),
+    ).values_list('role', 'credential')
+    return admins.union(dealers, all=True).order_by('role')
+
+def rehash_principal(role, username, new_hash):
+    """
+    Regrava o hash do Admin/Dealer com um único UPDATE (sem save() completo)
+    """
+    if role == 'Admin':
+        Admin.objects.filter(admin_name=username).update(passwd=new_hash)
+    else:
+        Dealer.objects.filter(dealer_id=username).update(dlpasswd=new_hash)
+
+def principal_role_expression():
+    """
+    Anotação com o papel (Admin/Dealer) do usuário Django (unlink_mirrored_users).
+    Fora de get_user: os papéis das requisições vêm dos grupos (roles.py).
+    """
+    return Case(
+        When(Exists(Admin.objects.filter(admin_name=OuterRef('username'))), then=Value('Admin')),
+        When(Exists(Dealer.objects.filter(dealer_id=OuterRef('username'))), then=Value('Dealer')),
+        default=Value(None),
+        output_field=CharField(),
+    )
 
 class CustomAuthBackend(BaseBackend):
     def authenticate(self, request, username=None, password=None):
         if not username or not password:
             return None
-            
-        print(f"Tentativa de login: {username}")
         
-        try:
-            # Verificar se é admin
-            admin = Admin.objects.get(admin_name=username)
-            print(f"Admin encontrado: {admin.admin_name}")
-            print(f"Hash no banco: {admin.passwd[:20]}...")
-            print(f"Hash válido: {is_valid_bcrypt_hash(admin.passwd)}")
+        with auth_trace():
+            # Admin e dealer com o mesmo nome vêm na mesma query (Admin primeiro)
+            with timed('lookup'):
+                principals = list(get_principals(username))
             
-            if check_password(password, admin.passwd):
-                print("Senha do admin válida!")
-                return self.get_or_create_user(username, password, 'Admin')
-            else:
-                print("Senha do admin inválida!")
-        except Admin.DoesNotExist:
-            print("Admin não encontrado")
-            pass
-        
-        try:
-            # Verificar se é dealer
-            dealer = Dealer.objects.get(dealer_id=username)
-            print(f"Dealer encontrado: {dealer.dealer_id}")
-            print(f"Hash no banco: {dealer.dlpasswd[:20]}...")
+            for role, hashed in principals:
+                # Regrava o hash se ele foi gerado com outro custo bcrypt
+                def setter(raw_password, role=role):
+                    rehash_principal(role, username, hash_password(raw_password))
+                
+                if check_password(password, hashed, setter):
+                    set_outcome('success')
+                    with timed('group_sync'):
+                        return self.get_or_create_user(username, role)
             
-            if check_password(password, dealer.dlpasswd):
-                print("Senha do dealer válida!")
-                return self.get_or_create_user(username, password, 'Dealer')
-            else:
-                print("Senha do dealer inválida!")
-        except Dealer.DoesNotExist:
-            print("Dealer não encontrado")
-            pass
+            set_outcome('failure')
+            return None
+    
+    async def aauthenticate(self, request, username=None, password=None):
+        """
+        Versão assíncrona: o bcrypt roda no pool limitado (pode levantar HashPoolSaturated)
+        """
+        if not username or not password:
+            return None
+        
+        hash_pool = get_hash_pool()
         
-        print("Autenticação falhou")
-        return None
+        with auth_trace():
+            with timed('lookup'):
+                principals = [principal async for principal in get_principals(username)]
+            
+            if not principals:
+                # Usuário desconhecido: um hash no pool, como o ModelBackend faria no
+                # event loop, para o tempo de resposta não revelar quais usuários existem
+                with timed('bcrypt_wait'):
+                    await asyncio.wrap_future(hash_pool.submit(hash_password, password))
+            
+            for role, hashed in principals:
+                # bcrypt_wait inclui a espera na fila do pool
+                with timed('bcrypt_wait'):
+                    valid = await hash_pool.acheck_password(password, hashed)
+                if valid:
+                    if password_needs_rehash(hashed):
+                        new_hash = await asyncio.wrap_future(hash_pool.submit(hash_password, password))
+                        await sync_to_async(rehash_principal)(role, username, new_hash)
+                    set_outcome('success')
+                    with timed('group_sync'):
+                        return await sync_to_async(self.get_or_create_user)(username, role)
+            
+            set_outcome('failure')
+            return None
     
-    def get_or_create_user(self, username, password, group_name):
+    def get_or_create_user(self, username, group_name):
+        # Busca o usuário e verifica o grupo na mesma query
+        groups_through = CustomUser.groups.through
+        membership = groups_through.objects.filter(customuser_id=OuterRef('pk'))
         try:
-            user = CustomUser.objects.get(username=username)
-            print(f"Usuário Django encontrado: {user.username}")
+            user = CustomUser.objects.annotate(
+                in_group=Exists(membership.filter(group__name=group_name)),
+                in_other_groups=Exists(membership.exclude(group__name=group_name)),
+            ).get(username=username)
         except CustomUser.DoesNotExist:
-            print(f"Criando novo usuário Django: {username}")
-            user = CustomUser.objects.create_user(username=username, password=password)
-        
-        # Garantir que o usuário está no grupo correto
-        group, created = Group.objects.get_or_create(name=group_name)
-        user.groups.clear()
-        user.groups.add(group)
-        user.save()
+            try:
+                user = CustomUser.objects.create_linked_user(username=username)
+            except IntegrityError:
+                # Outro login simultâneo criou o mesmo usuário
+                user = CustomUser.objects.get(username=username)
+            user.in_group = user.in_other_groups = False
         
-        print(f"Usuário {username} autenticado como {group_name}")
+        # Garantir que o usuário está no grupo correto - só escreve se mudou
+        if not user.in_group or user.in_other_groups:
+            self.sync_user_group(user, group_name)
+        # Após a sincronização o usuário está somente no grupo do papel
+        user._cached_roles = frozenset([group_name])
         return user
     
+    def sync_user_group(self, user, group_name):
+        """
+        Deixa o usuário apenas no grupo do papel, alterando só as linhas necessárias
+        """
+        group = get_cached_group(group_name)
+        current = set(user.groups.values_list('pk', flat=True))
+        
+        stale = current - {group.pk}
+        if stale:
+            user.groups.remove(*stale)
+        if group.pk not in current:
+            user.groups.add(group)
+    
     def get_user(self, user_id):
+        # Roda em toda requisição autenticada: normalmente atendido pelo cache (user_cache)
+        return load_user(user_id, self._load_user)
+    
+    def _load_user(self, user_id):
         try:
             return CustomUser.objects.get(pk=user_id)
         except CustomUser.DoesNotExist:
@@ -0,0 +1,143 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from .facets import cells_from_queryset, cells_from_vehicles
+from .pagination import CATALOG_ORDERING
+
+# =============================================================================
+# SNAPSHOT VERSIONADO DO CATÁLOGO DE VEÍCULOS
+# =============================================================================
+#
+# A lista ordenada, o agrupamento por marca e os totais são montados uma vez
+# e guardados no cache sob 'catalog:snapshot:<formato>:<versão>' (pesquisa).
+# As listagens paginadas não carregam o catálogo: leem só a página do banco e
+# usam o resumo agregado 'catalog:summary:<formato>:<versão>'. A versão fica em
+# 'catalog:version' e é trocada pelos signals de Vehicle e Purchase (após o
+# commit). Escritas que não disparam signals (queryset.update, bulk_create)
+# devem chamar bump_catalog_version(). 'dealers:version' faz o mesmo papel
+# para as concessionárias (signals de Dealer).
+
+CATALOG_VERSION_KEY = 'catalog:version'
+DEALERS_VERSION_KEY = 'dealers:version'
+
+# Formato do snapshot - incrementar ao mudar sua estrutura (faz parte da chave)
+SNAPSHOT_FORMAT = 7
+
+DEFAULT_CATALOG_CACHE_CONFIG = {
+    'TTL': 3600,  # Segundos que um snapshot fica no cache compartilhado
+}
+
+# Último snapshot/resumo usado neste processo - evita desserializar a cada request
+_local_values = {}
+_local_lock = threading.Lock()
+
+def _get_config():
+    return {**DEFAULT_CATALOG_CACHE_CONFIG, **getattr(settings, 'CATALOG_CACHE', {})}
+
+def _bump_version(key):
+    version = time.time_ns()
+    cache.set(key, version, None)
+    return version
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+def bump_catalog_version():
+    """Invalida o snapshot atual gerando uma nova versão do catálogo"""
+    return _bump_version(CATALOG_VERSION_KEY)
+
+def get_catalog_version():
+    """Versão atual do catálogo (criada na primeira leitura)"""
+    return _get_version(CATALOG_VERSION_KEY)
+
+def bump_dealers_version():
+    """Nova versão da lista de concessionárias (signals de Dealer)"""
+    return _bump_version(DEALERS_VERSION_KEY)
+
+def get_dealers_version():
+    return _get_version(DEALERS_VERSION_KEY)
+
+def summarize_vehicles(vehicles):
+    """
+    Agrupa por marca e calcula os totais de uma lista de veículos já ordenada
+    """
+    vehicles_by_brand = {}
+    total_available = 0
+    for vehicle in vehicles:
+        vehicles_by_brand.setdefault(vehicle.brand, []).append(vehicle)
+        total_available += vehicle.quantity_available
+    return {
+        'vehicles': vehicles,
+        'vehicles_by_brand': vehicles_by_brand,
+        'total_vehicles': len(vehicles),
+        'total_available': total_available,
+    }
+
+def build_catalog_snapshot():
+    """
+    Monta o snapshot a partir do banco (uma query) e a matriz marca x
+    carroceria das facetas
+    """
+    from .models import Vehicle
+
+    snapshot = summarize_vehicles(list(Vehicle.objects.order_by(*CATALOG_ORDERING)))
+    snapshot['facet_cells'] = cells_from_vehicles(snapshot['vehicles'])
+    return snapshot
+
+def build_catalog_summary():
+    """
+    Totais, facetas e maior updated_at (Last-Modified) do catálogo com
+    agregações no banco, sem carregar os veículos
+    """
+    from .models import Vehicle
+
+    cells = cells_from_queryset(Vehicle.objects.all())
+    totals = Vehicle.objects.aggregate(
+        last_modified=Max('updated_at'),
+        in_stock=Count('id', filter=Q(quantity_available__gt=0)),
+    )
+    return {
+        'total_vehicles': sum(cell['count'] for cell in cells.values()),
+        'total_available': sum(cell['available'] for cell in cells.values()),
+        'vehicles_in_stock': totals['in_stock'],
+        'facet_cells': cells,
+        'last_modified': totals['last_modified'],
+    }
+
+def _get_versioned(name, builder):
+    """
+    Valor da versão atual do catálogo: memória do processo, cache
+    compartilhado ou, na falta dos dois, builder()
+    """
+    version = get_catalog_version()
+    with _local_lock:
+        entry = _local_values.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+    key = f'catalog:{name}:{SNAPSHOT_FORMAT}:{version}'
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        # A versão acompanha o valor (chave dos fragmentos de template)
+        value['version'] = version
+        cache.set(key, value, _get_config()['TTL'])
+
+    with _local_lock:
+        _local_values[name] = (version, value)
+    return value
+
+def get_catalog_snapshot():
+    """Snapshot completo do catálogo (pesquisa por texto e por filtros)"""
+    return _get_versioned('snapshot', build_catalog_snapshot)
+
+def get_catalog_summary():
+    """Totais, facetas e Last-Modified do catálogo (listagens paginadas)"""
+    return _get_versioned('summary', build_catalog_summary)
@@ -0,0 +1,7 @@
+from .roles import get_request_roles
+
+def roles(request):
+    """
+    Disponibiliza os papéis do usuário aos templates sem consultar auth_user_groups
+    """
+    return {'user_roles': sorted(get_request_roles(request))}
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import close_old_connections, connections, router
+from django.utils.timezone import now as tz_now
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CACHE EM BANCO SEM CULL NO REQUEST + VARREDURA DE ENTRADAS EXPIRADAS
+# =============================================================================
+
+class SweptDatabaseCache(DatabaseCache):
+    """
+    DatabaseCache que, com OPTIONS['INLINE_CULL'] = False, não roda o cull
+    (DELETEs das linhas expiradas e das excedentes) dentro do set(). As linhas
+    expiradas são removidas em lotes pelo sweeper (comando purge_login_cache
+    ou thread).
+    """
+    def __init__(self, table, params):
+        super().__init__(table, params)
+        self._inline_cull = params.get('OPTIONS', {}).get('INLINE_CULL', True)
+
+    def _cull(self, db, cursor, now, num):
+        if self._inline_cull:
+            super()._cull(db, cursor, now, num)
+        # Sem cull no request: o sweeper remove as linhas expiradas
+
+    def purge_expired(self, batch_size=1000):
+        """
+        Remove as linhas expiradas em lotes de batch_size (sem travar a tabela inteira).
+        Retorna o número de linhas removidas.
+        """
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        now = connection.ops.adapt_datetimefield_value(tz_now().replace(microsecond=0))
+
+        deleted = 0
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    'SELECT %s FROM %s WHERE %s < %%s ORDER BY %s LIMIT %%s'
+                    % (quote_name('cache_key'), table, quote_name('expires'), quote_name('expires')),
+                    [now, batch_size],
+                )
+                keys = [row[0] for row in cursor.fetchall()]
+                if not keys:
+                    break
+                cursor.execute(
+                    'DELETE FROM %s WHERE %s IN (%s)'
+                    % (table, quote_name('cache_key'), ', '.join(['%s'] * len(keys))),
+                    keys,
+                )
+                deleted += len(keys)
+                if len(keys) < batch_size:
+                    break
+        return deleted
+
+    def count_rows(self):
+        """Tamanho atual da tabela (apenas para métricas - fora do request)"""
+        db = router.db_for_read(self.cache_model_class)
+        connection = connections[db]
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM %s' % connection.ops.quote_name(self._table))
+            return cursor.fetchone()[0]
+
+def purge_expired_counters(batch_size=1000):
+    """
+    Remove em lotes os contadores de tentativas de login já expirados
+    """
+    from .models import LoginAttemptCounter
+
+    deleted = 0
+    while True:
+        keys = list(
+            LoginAttemptCounter.objects.filter(expires_at__lte=tz_now())
+            .values_list('key', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        LoginAttemptCounter.objects.filter(key__in=keys).delete()
+        deleted += len(keys)
+        if len(keys) < batch_size:
+            break
+    return deleted
+
+# Métricas da última varredura e acumuladas no processo
+_sweeper_stats = {
+    'runs': 0,
+    'cache_deleted_total': 0,
+    'counters_deleted_total': 0,
+    'last_run': None,
+}
+_sweeper_lock = threading.Lock()
+
+def sweep(batch_size=1000, cache_alias='default'):
+    """
+    Varre o cache em banco e os contadores de login, atualizando as métricas
+    """
+    from .models import LoginAttemptCounter
+
+    start = time.perf_counter()
+    cache = caches[cache_alias]
+    cache_deleted = cache_rows = None
+    if isinstance(cache, SweptDatabaseCache):
+        cache_deleted = cache.purge_expired(batch_size)
+        cache_rows = cache.count_rows()
+    counters_deleted = purge_expired_counters(batch_size)
+
+    run = {
+        'finished_at': time.time(),
+        'duration_ms': (time.perf_counter() - start) * 1000,
+        'cache_deleted': cache_deleted,
+        'cache_rows': cache_rows,
+        'counters_deleted': counters_deleted,
+        'counter_rows': LoginAttemptCounter.objects.count(),
+    }
+    with _sweeper_lock:
+        _sweeper_stats['runs'] += 1
+        _sweeper_stats['cache_deleted_total'] += cache_deleted or 0
+        _sweeper_stats['counters_deleted_total'] += counters_deleted
+        _sweeper_stats['last_run'] = run
+    return run
+
+def get_sweeper_stats():
+    """Cópia das métricas do sweeper deste processo"""
+    with _sweeper_lock:
+        return dict(_sweeper_stats)
+
+# Thread de varredura do processo; o pid detecta um fork (gunicorn --preload),
+# que não herda a thread
+_sweeper_thread = {'thread': None, 'pid': None}
+_sweeper_start_lock = threading.Lock()
+
+def start_sweeper_thread(**kwargs):
+    """
+    Inicia a thread de varredura configurada em settings.LOGIN_CACHE_SWEEPER
+    (desligada por padrão). Conectada a request_started: só roda no processo que
+    atende requisições, nunca em migrate/shell, e é recriada após um fork.
+    A primeira varredura ocorre após INTERVAL segundos.
+    """
+    pid = os.getpid()
+    if _sweeper_thread['pid'] == pid:
+        return
+    config = getattr(settings, 'LOGIN_CACHE_SWEEPER', {})
+    if not config.get('ENABLED'):
+        return
+    interval = config.get('INTERVAL', 300)
+    batch_size = config.get('BATCH_SIZE', 1000)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                result = sweep(batch_size)
+                logger.info('Varredura do cache de login: %s', result)
+            except Exception:
+                logger.exception('Falha na varredura do cache de login')
+            finally:
+                close_old_connections()
+
+    with _sweeper_start_lock:
+        if _sweeper_thread['pid'] == pid:
+            return
+        thread = threading.Thread(target=run, name='login-cache-sweeper', daemon=True)
+        thread.start()
+        _sweeper_thread.update(thread=thread, pid=pid)
@@ -1,20 +1,25 @@
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.models import Group
+from django.contrib.auth.views import redirect_to_login
 from django.http import HttpResponseForbidden
 from django.shortcuts import render
 from django.contrib import messages
 from functools import wraps
+from .roles import has_role
 
 def group_required(group_name, login_url=None):
     """
     Decorator para views que verifica se o usuário pertence a um grupo específico.
     """
-    def in_group(user):
-        if user.is_authenticated:
-            return user.groups.filter(name=group_name).exists()
-        return False
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if has_role(request, group_name):
+                return view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), login_url)
+        return wrapper
     
-    return user_passes_test(in_group, login_url=login_url)
+    return decorator
 
 def admin_required(view_func):
     """
@@ -27,7 +32,7 @@ def admin_required(view_func):
             from django.shortcuts import redirect
             return redirect('login')
         
-        is_admin = request.user.groups.filter(name='Admin').exists()
+        is_admin = has_role(request, 'Admin')
         if not is_admin:
             messages.error(request, 'Acesso restrito para administradores.')
             return render(request, 'authentication/access_denied.html', {
@@ -48,7 +53,7 @@ def dealer_required(view_func):
             from django.shortcuts import redirect
             return redirect('login')
         
-        is_dealer = request.user.groups.filter(name='Dealer').exists()
+        is_dealer = has_role(request, 'Dealer')
         if not is_dealer:
             messages.error(request, 'Acesso restrito para dealers.')
             return render(request, 'authentication/access_denied.html', {
@@ -0,0 +1,57 @@
+from django.db.models import Count, Sum
+
+# =============================================================================
+# FACETAS DA PESQUISA DE VEÍCULOS (MARCA x CARROCERIA)
+# =============================================================================
+#
+# As contagens partem de uma matriz {(brand, body_type): {'count', 'available'}}
+# calculada uma vez - por um único GROUP BY ou a partir do snapshot do
+# catálogo. Cada faceta ignora o próprio filtro e respeita o outro, para que
+# as opções do select mostrem quantos veículos a troca de filtro encontraria.
+
+def cells_from_vehicles(vehicles):
+    """Matriz marca x carroceria a partir de uma lista de veículos"""
+    cells = {}
+    for vehicle in vehicles:
+        cell = cells.setdefault((vehicle.brand, vehicle.body_type), {'count': 0, 'available': 0})
+        cell['count'] += 1
+        cell['available'] += vehicle.quantity_available
+    return cells
+
+def cells_from_queryset(queryset):
+    """Matriz marca x carroceria com uma única query agrupada"""
+    rows = (
+        queryset.order_by()
+        .values('brand', 'body_type')
+        .annotate(count=Count('id'), available=Sum('quantity_available'))
+    )
+    return {
+        (row['brand'], row['body_type']): {'count': row['count'], 'available': row['available'] or 0}
+        for row in rows
+    }
+
+def build_facets(cells, brand=None, body_type=None):
+    """
+    Contagens por marca (com o filtro de carroceria) e por carroceria (com o
+    filtro de marca), incluindo as opções sem veículos
+    """
+    from .models import Vehicle
+
+    def facet(choices, axis, other_filter):
+        totals = {value: {'count': 0, 'available': 0} for value, _ in choices}
+        for key, cell in cells.items():
+            if other_filter and key[1 - axis] != other_filter:
+                continue
+            total = totals.setdefault(key[axis], {'count': 0, 'available': 0})
+            total['count'] += cell['count']
+            total['available'] += cell['available']
+        labels = dict(choices)
+        return [
+            {'value': value, 'label': labels.get(value, value), **total}
+            for value, total in totals.items()
+        ]
+
+    return {
+        'brands': facet(Vehicle.BRAND_CHOICES, 0, body_type),
+        'body_types': facet(Vehicle.BODY_TYPE_CHOICES, 1, brand),
+    }
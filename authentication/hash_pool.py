@@ -0,0 +1,100 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .utils import check_password
+
+# =============================================================================
+# POOL LIMITADO PARA VERIFICAÇÃO BCRYPT (LOGIN ASSÍNCRONO)
+# =============================================================================
+
+class HashPoolSaturated(Exception):
+    """
+    A fila de hashes está cheia - o login deve ser recusado (503)
+    """
+    pass
+
+class HashPool:
+    """
+    Executa bcrypt em um número fixo de threads (o bcrypt libera o GIL)
+    e limita quantos logins podem esperar na fila.
+    """
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='bcrypt'
+                    )
+        return self._executor
+
+    def _run(self, func, *args):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def submit(self, func, *args):
+        """
+        Envia um job ao pool ou levanta HashPoolSaturated se a fila estiver cheia
+        """
+        executor = self._get_executor()
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_pending:
+                self._rejected += 1
+                raise HashPoolSaturated()
+            self._queued += 1
+        return executor.submit(self._run, func, *args)
+
+    async def acheck_password(self, password, hashed):
+        """Versão assíncrona de check_password executada no pool"""
+        return await asyncio.wrap_future(self.submit(check_password, password, hashed))
+
+    def stats(self):
+        """
+        Retorna profundidade da fila e contadores do pool
+        """
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'active': self._active,
+                'queued': self._queued,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def get_hash_pool():
+    """
+    Retorna o pool do processo, criado a partir de settings.LOGIN_HASH_POOL
+    """
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                config = getattr(settings, 'LOGIN_HASH_POOL', {})
+                _hash_pool = HashPool(
+                    max_workers=config.get('MAX_WORKERS', min(4, os.cpu_count() or 1)),
+                    max_pending=config.get('MAX_PENDING', 32),
+                )
+    return _hash_pool
@@ -0,0 +1,93 @@
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.views.static import serve
+from .catalog import get_catalog_summary, get_catalog_version, get_dealers_version
+from .storage import vehicle_image_storage
+
+# =============================================================================
+# GET CONDICIONAL (ETag / Last-Modified) DAS PÁGINAS E APIs PÚBLICAS
+# =============================================================================
+#
+# As ETags combinam as versões do catálogo e das concessionárias (trocadas
+# pelos signals) com o que muda a resposta: URL, query string e, no HTML, o
+# usuário (a navbar do base.html). Com If-None-Match/If-Modified-Since válidos
+# a resposta é 304 sem renderizar nem serializar. Páginas privadas continuam
+# com no-store (set_secure_headers / SecurityHeadersMiddleware).
+
+DEFAULT_PUBLIC_CACHE_CONFIG = {
+    'MAX_AGE': 0,  # Segundos de cache sem revalidar (0 = sempre revalida com a ETag)
+    'IMMUTABLE_MAX_AGE': 31536000,  # Arquivos endereçados por conteúdo (storage.py)
+}
+
+def _get_config():
+    return {**DEFAULT_PUBLIC_CACHE_CONFIG, **getattr(settings, 'PUBLIC_CACHE', {})}
+
+def _etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def _has_pending_messages(request):
+    # len() carrega as mensagens sem marcá-las como lidas
+    return len(get_messages(request)) > 0
+
+def _page_variant(request):
+    """Parte da ETag do HTML que depende de quem pede"""
+    user = request.user
+    return f'user:{user.pk}' if user.is_authenticated else 'anon'
+
+def catalog_page_etag(request, *args, **kwargs):
+    """ETag das páginas de veículos; None (sem 304) se há mensagens a exibir"""
+    if _has_pending_messages(request):
+        return None
+    return _etag(get_catalog_version(), get_dealers_version(), _page_variant(request), request.get_full_path())
+
+def catalog_last_modified(request, *args, **kwargs):
+    """Maior Vehicle.updated_at do catálogo (resumo versionado)"""
+    if _has_pending_messages(request):
+        return None
+    return get_catalog_summary()['last_modified']
+
+def dealers_page_etag(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    return _etag(get_dealers_version(), _page_variant(request), request.get_full_path())
+
+def catalog_api_etag(request, *args, **kwargs):
+    """ETag das APIs de veículos - o JSON não depende do usuário, só do Accept"""
+    return _etag(get_catalog_version(), request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+
+def dealers_api_etag(request, *args, **kwargs):
+    return _etag(get_dealers_version(), request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+
+def public_conditional(etag_func, last_modified_func=None, per_user=True):
+    """
+    GET condicional + política de cache pública. Com per_user (HTML com a
+    navbar do usuário) respostas de usuários logados ficam 'private'.
+    """
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                if per_user and request.user.is_authenticated:
+                    patch_cache_control(response, private=True, no_cache=True)
+                else:
+                    patch_cache_control(response, public=True, max_age=_get_config()['MAX_AGE'], must_revalidate=True)
+            return response
+        return wrapper
+    return decorator
+
+def serve_immutable_media(request, path):
+    """
+    Serve um arquivo endereçado por conteúdo (vehicles/<sha256>.jpg) em DEBUG,
+    com os mesmos cabeçalhos que o servidor web aplica em produção. O nome
+    muda junto com o conteúdo, então o navegador pode guardá-lo sem revalidar.
+    """
+    response = serve(request, path, document_root=vehicle_image_storage().location)
+    patch_cache_control(response, public=True, max_age=_get_config()['IMMUTABLE_MAX_AGE'], immutable=True)
+    return response
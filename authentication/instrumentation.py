@@ -0,0 +1,168 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('authentication.auth')
+
+# =============================================================================
+# INSTRUMENTAÇÃO DO PIPELINE DE LOGIN
+# =============================================================================
+#
+# timed(stage) mede uma etapa (lookup, bcrypt, group_sync, lockout_*,
+# rate_limit) e soma nos contadores agregados do processo. Dentro de um
+# auth_trace() a etapa também entra no evento do login, que é registrado em
+# log (JSON) para uma amostra de AUTH_INSTRUMENTATION['SAMPLE_RATE'] logins.
+
+_current_trace = ContextVar('auth_trace', default=None)
+
+class AuthTrace:
+    """Tempos por etapa de um login"""
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.outcome = None
+
+    def add(self, stage, elapsed_ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+
+class AuthMetrics:
+    """
+    Contadores agregados do processo: por etapa (quantidade, total e máximo em ms)
+    e por resultado do login
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._outcomes = {}
+
+    def observe(self, stage, elapsed_ms):
+        with self._lock:
+            stats = self._stages.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def count_outcome(self, outcome):
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'stages': {
+                    stage: {**stats, 'avg_ms': stats['total_ms'] / stats['count']}
+                    for stage, stats in self._stages.items()
+                },
+                'outcomes': dict(self._outcomes),
+            }
+
+auth_metrics = AuthMetrics()
+
+def _sample_rate():
+    return getattr(settings, 'AUTH_INSTRUMENTATION', {}).get('SAMPLE_RATE', 0.1)
+
+@contextmanager
+def timed(stage):
+    """Mede uma etapa do login"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        auth_metrics.observe(stage, elapsed_ms)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed_ms)
+
+def set_outcome(outcome):
+    """Registra o resultado do login em andamento (success, failure, locked...)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.outcome = outcome
+
+@contextmanager
+def auth_trace():
+    """
+    Abre o evento de um login; chamadas aninhadas reutilizam o evento atual
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = AuthTrace(sampled=random.random() < _sample_rate())
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        _finish(trace)
+
+def _finish(trace):
+    elapsed_ms = (time.perf_counter() - trace.started) * 1000
+    outcome = trace.outcome or 'unknown'
+    auth_metrics.observe('total', elapsed_ms)
+    auth_metrics.count_outcome(outcome)
+    if trace.sampled:
+        logger.info(json.dumps({
+            'event': 'login',
+            'outcome': outcome,
+            'total_ms': round(elapsed_ms, 2),
+            'stages_ms': {stage: round(ms, 2) for stage, ms in trace.stages.items()},
+        }))
+
+def instrument_login(view_func):
+    """
+    Decorator das views de login: cada POST vira um evento de login
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return await view_func(request, *args, **kwargs)
+            with auth_trace():
+                return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+        with auth_trace():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+_listener = None
+
+def install_queue_logging():
+    """
+    Move os handlers do logger 'authentication.auth' (settings.LOGGING) para
+    trás de um QueueHandler: o request só enfileira o registro e uma thread
+    (QueueListener) faz a escrita.
+    """
+    global _listener
+    if _listener is not None or not logger.handlers:
+        return
+    handlers = list(logger.handlers)
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
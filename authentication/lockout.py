@@ -0,0 +1,141 @@
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .models import LoginAttemptCounter
+from .utils import get_client_ip_address, get_login_attempts_key
+from .instrumentation import timed
+
+# =============================================================================
+# MOTOR DE BLOQUEIO POR TENTATIVAS (CONTADORES ATÔMICOS)
+# =============================================================================
+
+DEFAULT_LOCKOUT_CONFIG = {
+    'MAX_LOGIN_ATTEMPTS': 8,
+    'LOCKOUT_TIME': 900,
+    'IP_LOCKOUT_ATTEMPTS': 15,
+    'IP_LOCKOUT_TIME': 1800,
+}
+
+def _counter_key(key):
+    """Chaves longas (username arbitrário do POST) viram um digest de tamanho fixo"""
+    if len(key) <= 200:
+        return key
+    return 'sha1:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+class LockoutEngine:
+    """
+    Contadores de falhas por usuário+IP e por IP na tabela login_attempt_counters.
+    Cada falha é um UPDATE count = count + 1 por contador e todo o estado de
+    bloqueio é lido com um único SELECT.
+    """
+    def __init__(self, config=None):
+        self.config = {**DEFAULT_LOCKOUT_CONFIG, **(config or {})}
+
+    def _keys(self, request, username):
+        ip_address = get_client_ip_address(request)
+        user_key = _counter_key(get_login_attempts_key(username, ip_address))
+        ip_key = _counter_key(f'ip_attempts:{ip_address}')
+        return ip_address, user_key, ip_key
+
+    def _increment(self, key, ttl, now):
+        expires_at = now + timedelta(seconds=ttl)
+        counters = LoginAttemptCounter.objects.filter(key=key)
+        # count é atribuído antes de expires_at: o CASE enxerga a expiração antiga
+        # (o MySQL avalia o SET da esquerda para a direita)
+        updated = counters.update(
+            count=Case(When(expires_at__gt=now, then=F('count') + 1), default=Value(1)),
+            expires_at=expires_at,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                LoginAttemptCounter.objects.create(key=key, count=1, expires_at=expires_at)
+        except IntegrityError:
+            # Outra requisição criou o contador ao mesmo tempo
+            counters.update(count=F('count') + 1, expires_at=expires_at)
+
+    def _status(self, user_key, ip_key, now):
+        counters = {
+            key: (count, expires_at)
+            for key, count, expires_at in LoginAttemptCounter.objects.filter(
+                key__in=[user_key, ip_key], expires_at__gt=now
+            ).values_list('key', 'count', 'expires_at')
+        }
+        attempts, user_expires_at = counters.get(user_key, (0, None))
+        ip_attempts, ip_expires_at = counters.get(ip_key, (0, None))
+
+        status = {
+            'locked': False,
+            'total_attempts': attempts,
+            'ip_attempts': ip_attempts,
+            'remaining_attempts': max(0, self.config['MAX_LOGIN_ATTEMPTS'] - attempts),
+        }
+
+        if ip_attempts >= self.config['IP_LOCKOUT_ATTEMPTS']:
+            remaining_time = int((ip_expires_at - now).total_seconds() / 60)
+            status.update({
+                'locked': True,
+                'reason': 'ip',
+                'until': ip_expires_at.timestamp(),
+                'message': f'IP bloqueado por excesso de tentativas. Tente novamente em {remaining_time} minutos.'
+            })
+        elif attempts >= self.config['MAX_LOGIN_ATTEMPTS']:
+            remaining_time = int((user_expires_at - now).total_seconds() / 60)
+            status.update({
+                'locked': True,
+                'reason': 'user',
+                'until': user_expires_at.timestamp(),
+                'message': f'Conta bloqueada por excesso de tentativas. Tente novamente em {remaining_time} minutos.'
+            })
+
+        return status
+
+    def check(self, request, username):
+        """
+        Estado de bloqueio e tentativas restantes - uma única query
+        """
+        ip_address, user_key, ip_key = self._keys(request, username)
+        with timed('lockout_check'):
+            status = self._status(user_key, ip_key, timezone.now())
+        status['ip_address'] = ip_address
+        return status
+
+    def register_failure(self, request, username):
+        """
+        Registra uma tentativa falha e retorna o novo estado de bloqueio
+        """
+        ip_address, user_key, ip_key = self._keys(request, username)
+        now = timezone.now()
+
+        session_attempts = request.session.get('login_attempts', 0) + 1
+        request.session['login_attempts'] = session_attempts
+
+        with timed('lockout_update'):
+            self._increment(user_key, self.config['LOCKOUT_TIME'], now)
+            self._increment(ip_key, self.config['IP_LOCKOUT_TIME'], now)
+            status = self._status(user_key, ip_key, now)
+        status['ip_address'] = ip_address
+        status['session_attempts'] = session_attempts
+        return status
+
+    def reset(self, request, username):
+        """
+        Zera os contadores após login bem-sucedido
+        """
+        ip_address, user_key, ip_key = self._keys(request, username)
+
+        if 'login_attempts' in request.session:
+            del request.session['login_attempts']
+        if 'locked_until' in request.session:
+            del request.session['locked_until']
+
+        with timed('lockout_reset'):
+            LoginAttemptCounter.objects.filter(key__in=[user_key, ip_key]).delete()
+
+def get_lockout_engine():
+    """Motor configurado com settings.LOGIN_SECURITY_CONFIG"""
+    return LockoutEngine(getattr(settings, 'LOGIN_SECURITY_CONFIG', None))
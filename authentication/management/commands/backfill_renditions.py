@@ -0,0 +1,113 @@
+# authentication/management/commands/backfill_renditions.py
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from authentication.catalog import bump_catalog_version
+from authentication.models import Vehicle
+from authentication.renditions import backfill_image, get_rendition_config, scan_source_images
+
+class Command(BaseCommand):
+    help = (
+        'Gera em paralelo as rendições JPEG/WebP que faltam para as imagens de veículos '
+        'existentes (Vehicle.image e MEDIA_ROOT/vehicles). Pode ser interrompido e executado de novo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos no pool (padrão: número de CPUs; 1 = sem pool)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Veículos atualizados por transação (padrão: 500)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regera todas as rendições, mesmo as que estão em dia',
+        )
+
+    def handle(self, *args, **options):
+        storage = Vehicle._meta.get_field('image').storage
+        if not isinstance(storage, FileSystemStorage):
+            raise CommandError('O backfill lê e grava direto no disco e requer um FileSystemStorage')
+        media_root = storage.location
+        config = get_rendition_config()
+
+        # Imagem -> [(id do veículo, image_renditions gravado)]
+        vehicles_by_image = defaultdict(list)
+        rows = Vehicle.objects.exclude(image='').exclude(image__isnull=True).values_list('id', 'image', 'image_renditions')
+        for pk, image, renditions in rows.iterator():
+            vehicles_by_image[image].append((pk, renditions))
+        names = sorted(set(vehicles_by_image) | set(scan_source_images(media_root, config)))
+
+        tasks = [
+            (name, media_root, config, vehicles_by_image[name][0][1] if name in vehicles_by_image else None, options['force'])
+            for name in names
+        ]
+        workers = max(1, options['workers'])
+        self.stdout.write(f'🖼️  {len(tasks)} imagens ({len(vehicles_by_image)} de veículos) com {workers} processo(s)')
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+        results = executor.map(backfill_image, tasks, chunksize=chunksize) if executor else map(backfill_image, tasks)
+
+        counts = Counter()
+        pending = []
+        updated = 0
+        start = time.perf_counter()
+        try:
+            for done, (name, status, result) in enumerate(results, start=1):
+                counts[status] += 1
+                if status == 'error':
+                    self.stderr.write(f'❌ {name}: {result}')
+                else:
+                    pending.extend(
+                        Vehicle(pk=pk, image_renditions=result)
+                        for pk, recorded in vehicles_by_image.get(name, ())
+                        if recorded != result
+                    )
+                if len(pending) >= options['batch_size']:
+                    updated += self._flush(pending)
+                if done % 500 == 0:
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f'   {done}/{len(tasks)} imagens ({done / elapsed:.1f} imagens/s)')
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                '⏹️  Interrompido - execute o comando de novo para continuar de onde parou'
+            ))
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            updated += self._flush(pending)
+            if updated:
+                # update() não dispara os signals que invalidam o snapshot do catálogo
+                bump_catalog_version()
+
+        elapsed = time.perf_counter() - start
+        processed = sum(counts.values())
+        rate = processed / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"Geradas: {counts['generated']}, em dia: {counts['skipped']}, erros: {counts['error']}, "
+            f"veículos atualizados: {updated}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {processed} imagens em {elapsed:.1f} s ({rate:.1f} imagens/s)'
+        ))
+
+    def _flush(self, pending):
+        if not pending:
+            return 0
+        with transaction.atomic():
+            Vehicle.objects.bulk_update(pending, ['image_renditions'])
+        count = len(pending)
+        pending.clear()
+        return count
@@ -0,0 +1,82 @@
+# authentication/management/commands/benchmark_purchases.py
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from authentication.models import Dealer, Purchase, Vehicle
+from authentication.purchases import OutOfStock, place_purchase
+
+class Command(BaseCommand):
+    help = (
+        'Compra o mesmo veículo a partir de várias threads e mede compras/s e vendas acima do '
+        'estoque (dados sintéticos removidos ao final)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            nargs='+',
+            default=[1, 4, 16],
+            help='Quantidades de threads medidas (padrão: 1 4 16)',
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=500,
+            help='Estoque inicial do veículo em cada rodada (padrão: 500)',
+        )
+
+    def run_round(self, vehicle, dealer, thread_count):
+        sold = []
+        barrier = threading.Barrier(thread_count)
+
+        def buyer():
+            barrier.wait()
+            try:
+                while True:
+                    place_purchase(Purchase(
+                        vehicle_id=vehicle.pk, dealer=dealer, customer_name='Benchmark', gender='N',
+                        email='benchmark@example.com', phone='0', monthly_salary=0,
+                    ))
+                    sold.append(1)
+            except OutOfStock:
+                pass
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer) for _ in range(thread_count)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(sold), time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        stock = options['stock']
+        dealer = Dealer.objects.create(
+            dealer_id='BENCH', dealer_name='Benchmark', dlpasswd='-', is_public=False,
+        )
+        vehicle = Vehicle.objects.create(name='Benchmark', brand='BYD', body_type='SEDAN', quantity_available=0)
+        try:
+            self.stdout.write(f'🛒 Estoque de {stock} unidades por rodada')
+            oversold = 0
+            for thread_count in options['threads']:
+                Vehicle.objects.filter(pk=vehicle.pk).update(quantity_available=stock)
+                sold, elapsed = self.run_round(vehicle, dealer, thread_count)
+                remaining = Vehicle.objects.get(pk=vehicle.pk).quantity_available
+                oversold += max(0, sold - stock)
+                self.stdout.write(
+                    f'{thread_count:>3} threads: {sold} compras em {elapsed:.2f} s '
+                    f'({sold / elapsed:7.1f} compras/s), estoque final {remaining}'
+                )
+        finally:
+            # Remove o veículo, a concessionária e as compras sintéticas (CASCADE)
+            vehicle.delete()
+            dealer.delete()
+
+        if oversold:
+            self.stdout.write(self.style.ERROR(f'❌ {oversold} compras acima do estoque'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Nenhuma compra acima do estoque'))
@@ -0,0 +1,79 @@
+# authentication/management/commands/benchmark_serializers.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authentication.models import Dealer, Vehicle
+from authentication.serializers import (
+    DealerSerializer, DealerValuesSerializer, VehicleSerializer, VehicleValuesSerializer,
+)
+
+class Command(BaseCommand):
+    help = 'Compara o ModelSerializer com a serialização por .values() das APIs públicas (dados descartados ao final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000,
+            help='Linhas de cada tabela (padrão: 10000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Execuções medidas por variante - vale a melhor (padrão: 5)',
+        )
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings), result
+
+    def compare(self, label, repeat, model_path, fast_path):
+        model_ms, model_data = self.best_of(repeat, model_path)
+        fast_ms, fast_data = self.best_of(repeat, fast_path)
+        same = [dict(item) for item in model_data] == fast_data
+        self.stdout.write(
+            f'{label:<15}: ModelSerializer {model_ms:8.1f} ms | .values() {fast_ms:8.1f} ms | '
+            f'{model_ms / fast_ms:5.1f}x {"✅ mesmo JSON" if same else "❌ JSON diferente"}'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            Vehicle.objects.bulk_create([
+                Vehicle(
+                    name=f'Veículo {i:05d}',
+                    brand='TOYOTA' if i % 2 else 'BYD',
+                    body_type=('SUV', 'SEDAN', 'HATCHBACK')[i % 3],
+                    quantity_available=i % 7,
+                    image=f'vehicles/{i}.jpg' if i % 4 else '',
+                )
+                for i in range(rows)
+            ], batch_size=1000)
+            Dealer.objects.bulk_create([
+                Dealer(dealer_id=f'B{i:04d}', dealer_name=f'Dealer {i}', dlpasswd='-', is_public=True)
+                for i in range(min(rows, 10_000))
+            ], batch_size=1000)
+            self.stdout.write(f'📊 {rows} veículos, melhor de {repeat} execuções')
+
+            vehicles = Vehicle.objects.order_by('brand', 'name', 'id')
+            dealers = Dealer.objects.filter(is_public=True).order_by('dealer_name')
+            self.compare(
+                'Veículos', repeat,
+                lambda: VehicleSerializer(vehicles.all(), many=True).data,
+                lambda: VehicleValuesSerializer(VehicleValuesSerializer.values(vehicles.all())).data,
+            )
+            self.compare(
+                'Concessionárias', repeat,
+                lambda: DealerSerializer(dealers.all(), many=True).data,
+                lambda: DealerValuesSerializer(DealerValuesSerializer.values(dealers.all())).data,
+            )
+
+            # Os dados sintéticos não ficam no banco
+            transaction.set_rollback(True)
@@ -0,0 +1,73 @@
+# authentication/management/commands/benchmark_suggest.py
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from authentication.suggest import SuggestIndex
+
+MODELS = ['Corolla', 'Hilux', 'Yaris', 'Etios', 'Camry', 'Dolphin', 'Seal', 'Song', 'Tang', 'Han', 'Yuan']
+VERSIONS = ['Cross', 'Plus', 'Mini', 'GR', 'XEi', 'Altis', 'Hybrid', 'Pro', 'EV', 'Sport']
+
+class Command(BaseCommand):
+    help = 'Mede a latência das sugestões de nome (índice em memória) com um catálogo sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--names',
+            type=int,
+            default=100_000,
+            help='Quantidade de nomes de veículos no índice (padrão: 100000)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=10_000,
+            help='Consultas medidas (padrão: 10000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        names = [
+            f'{rng.choice(MODELS)} {rng.choice(VERSIONS)} {rng.randint(2000, 2026)} {i}'
+            for i in range(options['names'])
+        ]
+
+        start = time.perf_counter()
+        index = SuggestIndex(enumerate(names, start=1))
+        build_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(f'📚 Índice com {len(index)} nomes montado em {build_ms:.0f} ms')
+
+        # Prefixos de 1 a 6 caracteres de palavras reais dos nomes
+        words = MODELS + VERSIONS
+        prefixes = [rng.choice(words)[:rng.randint(1, 6)] for _ in range(options['queries'])]
+
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.suggest(prefix, 10)
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        timings.sort()
+
+        def percentile(p):
+            return timings[min(len(timings) - 1, int(len(timings) * p))]
+
+        self.stdout.write(
+            f'⏱️  {len(timings)} consultas: média {statistics.mean(timings):.1f} µs, '
+            f'p50 {percentile(0.50):.1f} µs, p99 {percentile(0.99):.1f} µs, máx {timings[-1]:.1f} µs'
+        )
+
+        start = time.perf_counter()
+        for pk in range(1, 1001):
+            index.add(pk, f'{rng.choice(MODELS)} Atualizado {pk}')
+        update_us = (time.perf_counter() - start) * 1_000_000 / 1000
+        self.stdout.write(f'✏️  Atualização incremental: {update_us:.1f} µs por veículo')
+
+        if percentile(0.99) < 1000:
+            self.stdout.write(self.style.SUCCESS('✅ p99 abaixo de 1 ms'))
+        else:
+            self.stdout.write(self.style.WARNING('⚠️  p99 acima de 1 ms'))
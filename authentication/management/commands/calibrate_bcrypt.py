@@ -0,0 +1,75 @@
+# authentication/management/commands/calibrate_bcrypt.py
+import time
+import bcrypt
+from django.core.management.base import BaseCommand
+from authentication.utils import get_bcrypt_rounds
+
+class Command(BaseCommand):
+    help = 'Mede o bcrypt neste servidor e sugere o maior custo dentro do orçamento de latência'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=250,
+            help='Tempo máximo de verificação de uma senha em ms (padrão: 250)',
+        )
+        parser.add_argument(
+            '--min-rounds',
+            type=int,
+            default=10,
+            help='Custo mínimo aceitável (padrão: 10)',
+        )
+        parser.add_argument(
+            '--max-rounds',
+            type=int,
+            default=16,
+            help='Custo máximo testado (padrão: 16)',
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=3,
+            help='Verificações medidas por custo (padrão: 3)',
+        )
+
+    def measure(self, rounds, samples):
+        """Menor tempo (ms) de bcrypt.checkpw para o custo informado"""
+        password = b'calibracao-bcrypt'
+        hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            bcrypt.checkpw(password, hashed)
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        target_ms = options['target_ms']
+        self.stdout.write(f'Calibrando bcrypt (orçamento: {target_ms:.0f} ms por verificação)...')
+
+        chosen = None
+        for rounds in range(options['min_rounds'], options['max_rounds'] + 1):
+            elapsed = self.measure(rounds, options['samples'])
+            within_budget = elapsed <= target_ms
+            self.stdout.write(f'  custo {rounds:2d}: {elapsed:8.1f} ms {"✅" if within_budget else "❌"}')
+            if not within_budget:
+                # Cada custo a mais dobra o tempo - não adianta continuar
+                break
+            chosen = rounds
+
+        if chosen is None:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Nem o custo {options["min_rounds"]} cabe no orçamento; mantenha BCRYPT_ROUNDS = {options["min_rounds"]} '
+                'ou aumente --target-ms'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Custo recomendado: BCRYPT_ROUNDS = {chosen} (atual: {get_bcrypt_rounds()})'
+        ))
+        if chosen != get_bcrypt_rounds():
+            self.stdout.write(
+                'Defina BCRYPT_ROUNDS (settings ou variável de ambiente); '
+                'as senhas são regravadas com o novo custo no próximo login.'
+            )
@@ -0,0 +1,87 @@
+# authentication/management/commands/dedupe_vehicle_images.py
+import os
+import shutil
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from authentication.catalog import bump_catalog_version
+from authentication.models import Vehicle
+from authentication.renditions import SOURCE_EXTENSIONS, file_digest
+from authentication.storage import ContentAddressedStorage, hashed_name
+
+class Command(BaseCommand):
+    help = (
+        'Renomeia as imagens de veículos para o SHA-256 do conteúdo, remove as cópias '
+        'idênticas e atualiza Vehicle.image'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra o que seria feito',
+        )
+
+    def handle(self, *args, **options):
+        storage = Vehicle._meta.get_field('image').storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError('Vehicle.image não usa ContentAddressedStorage (STORAGES["vehicle_images"])')
+        root = storage.path(storage.directory)
+        if not os.path.isdir(root):
+            self.stdout.write(f'📁 {root} não existe - nada a fazer')
+            return
+
+        # Nome endereçado por conteúdo -> nomes atuais com aquele conteúdo
+        groups = defaultdict(list)
+        scanned = 0
+        for filename in sorted(os.listdir(root)):
+            path = os.path.join(root, filename)
+            if not os.path.isfile(path) or os.path.splitext(filename)[1].lower() not in SOURCE_EXTENSIONS:
+                continue
+            scanned += 1
+            name = f'{storage.directory}/{filename}'
+            target = hashed_name(storage.directory, file_digest(path), filename)
+            if name != target:
+                groups[target].append(name)
+
+        old_names = [name for names in groups.values() for name in names]
+        old_bytes = sum(storage.size(name) for name in old_names)
+        new_targets = [target for target in groups if not storage.exists(target)]
+        freed = old_bytes - sum(storage.size(groups[target][0]) for target in new_targets)
+        self.stdout.write(
+            f'🔍 {scanned} arquivos em {storage.directory}/: {len(old_names)} a renomear '
+            f'em {len(groups)} conteúdos distintos'
+        )
+
+        if options['dry_run']:
+            for target, names in sorted(groups.items()):
+                self.stdout.write(f"   {target} <- {', '.join(names)}")
+            self.stdout.write(self.style.WARNING(f'⚠️  Dry-run: {freed / 1024:.1f} KB seriam liberados'))
+            return
+
+        for target in new_targets:
+            source, destination = storage.path(groups[target][0]), storage.path(target)
+            try:
+                os.link(source, destination)
+            except OSError:
+                shutil.copy2(source, destination)
+
+        updated = 0
+        with transaction.atomic():
+            for target, names in groups.items():
+                updated += Vehicle.objects.filter(image__in=names).update(image=target)
+        if updated:
+            # update() não dispara os signals que invalidam o snapshot do catálogo
+            bump_catalog_version()
+
+        # Só depois do commit: nenhum veículo aponta mais para os nomes antigos
+        for name in old_names:
+            storage.delete(name)
+
+        self.stdout.write(f'Veículos atualizados: {updated}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(old_names)} arquivos substituídos por {len(new_targets)} novos '
+            f'({freed / 1024:.1f} KB liberados)'
+        ))
+        if updated:
+            self.stdout.write('💡 Execute backfill_renditions para gerar as rendições com os novos nomes')
@@ -1,6 +1,6 @@
 # authentication/management/commands/fix_passwords.py
 from django.core.management.base import BaseCommand
-import bcrypt
+from authentication.utils import hash_password
 from authentication.models import Admin, Dealer
 
 class Command(BaseCommand):
@@ -11,15 +11,15 @@ class Command(BaseCommand):
         
         # Gerar hash válido para 'test'
         senha_test = 'test'
-        hash_test = bcrypt.hashpw(senha_test.encode('utf-8'), bcrypt.gensalt(12)).decode('utf-8')
+        hash_test = hash_password(senha_test)
         
         # Gerar hash válido para 'dealer123'
         senha_dealer123 = 'dealer123'
-        hash_dealer123 = bcrypt.hashpw(senha_dealer123.encode('utf-8'), bcrypt.gensalt(12)).decode('utf-8')
+        hash_dealer123 = hash_password(senha_dealer123)
         
         # Gerar hash válido para 'dealer456'
         senha_dealer456 = 'dealer456'
-        hash_dealer456 = bcrypt.hashpw(senha_dealer456.encode('utf-8'), bcrypt.gensalt(12)).decode('utf-8')
+        hash_dealer456 = hash_password(senha_dealer456)
         
         # Atualizar admin
         try:
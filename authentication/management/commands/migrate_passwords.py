@@ -1,32 +1,38 @@
 # authentication/management/commands/migrate_passwords.py
+import os
 from django.core.management.base import BaseCommand
-from authentication.utils import hash_password
-from authentication.models import Admin, Dealer
+from authentication.utils import migrate_passwords
 
 class Command(BaseCommand):
     help = 'Migra senhas em texto plano para hash bcrypt'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Linhas por lote de hash/bulk_update (padrão: 500)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos gerando hashes em paralelo (padrão: número de núcleos)',
+        )
+
+    def report_progress(self, migrated, elapsed):
+        rate = migrated / elapsed if elapsed else 0
+        self.stdout.write(f'  {migrated} senhas migradas ({rate:.1f} hashes/s)')
+
     def handle(self, *args, **options):
-        self.stdout.write('Iniciando migração de senhas...')
-        
-        # Migrar admins
-        admins_migrated = 0
-        for admin in Admin.objects.all():
-            if not admin.passwd.startswith('$2b$'):
-                admin.passwd = hash_password(admin.passwd)
-                admin.save()
-                admins_migrated += 1
+        self.stdout.write(f'Iniciando migração de senhas ({options["workers"]} processos)...')
         
-        # Migrar dealers
-        dealers_migrated = 0
-        for dealer in Dealer.objects.all():
-            if not dealer.dlpasswd.startswith('$2b$'):
-                dealer.dlpasswd = hash_password(dealer.dlpasswd)
-                dealer.save()
-                dealers_migrated += 1
+        migrated = migrate_passwords(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=self.report_progress,
+        )
         
         self.stdout.write(
-            self.style.SUCCESS(
-                f'Migração concluída: {admins_migrated} admins e {dealers_migrated} dealers migrados'
-            )
-        )
\ No newline at end of file
+            self.style.SUCCESS(f'Migração concluída: {migrated} senhas migradas')
+        )
@@ -0,0 +1,35 @@
+# authentication/management/commands/purge_login_cache.py
+from django.core.management.base import BaseCommand
+from authentication.dbcache import sweep
+
+class Command(BaseCommand):
+    help = 'Remove em lotes as entradas expiradas do cache de login e dos contadores de tentativas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Linhas removidas por DELETE (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--cache',
+            default='default',
+            help='Alias do cache em banco (padrão: default)',
+        )
+
+    def handle(self, *args, **options):
+        result = sweep(options['batch_size'], options['cache'])
+
+        if result['cache_deleted'] is None:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  O cache '{options['cache']}' não usa SweptDatabaseCache - apenas os contadores foram varridos"
+            ))
+        else:
+            self.stdout.write(
+                f"Cache: {result['cache_deleted']} entradas expiradas removidas, {result['cache_rows']} restantes"
+            )
+        self.stdout.write(
+            f"Contadores de login: {result['counters_deleted']} removidos, {result['counter_rows']} restantes"
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Varredura concluída em {result['duration_ms']:.1f} ms"))
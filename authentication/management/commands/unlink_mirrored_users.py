@@ -0,0 +1,63 @@
+# authentication/management/commands/unlink_mirrored_users.py
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand
+from authentication.backends import principal_role_expression
+from authentication.models import CustomUser
+
+class Command(BaseCommand):
+    help = 'Remove a senha própria dos usuários Django espelhados de Admin/Dealer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Quantidade de usuários por UPDATE (padrão: 500)',
+        )
+        parser.add_argument(
+            '--include-superusers',
+            action='store_true',
+            help='Também converte superusuários (perdem o login via /admin/ com senha Django)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra quantos usuários seriam convertidos',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # Usuários com Admin/Dealer correspondente que ainda têm senha utilizável
+        users = CustomUser.objects.annotate(
+            principal_role=principal_role_expression()
+        ).filter(
+            principal_role__isnull=False
+        ).exclude(
+            password__startswith=UNUSABLE_PASSWORD_PREFIX
+        ).only('pk', 'password')
+
+        if not options['include_superusers']:
+            users = users.exclude(is_superuser=True)
+
+        if options['dry_run']:
+            self.stdout.write(f'{users.count()} usuário(s) espelhado(s) seriam convertidos')
+            return
+
+        converted = 0
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            user.set_unusable_password()
+            batch.append(user)
+            if len(batch) >= batch_size:
+                CustomUser.objects.bulk_update(batch, ['password'])
+                converted += len(batch)
+                batch = []
+
+        if batch:
+            CustomUser.objects.bulk_update(batch, ['password'])
+            converted += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {converted} usuário(s) espelhado(s) convertidos para senha não utilizável')
+        )
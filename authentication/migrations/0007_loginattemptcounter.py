@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_purchase_cep_purchase_city_purchase_neighborhood_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginAttemptCounter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'login_attempt_counters',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_loginattemptcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['brand', 'name', 'id'], name='vehicles_catalog_order_idx'),
+        ),
+    ]
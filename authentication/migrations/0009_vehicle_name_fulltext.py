@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Só o MySQL tem FULLTEXT; nos demais bancos a busca usa o índice de trigramas em memória
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE vehicles ADD FULLTEXT INDEX vehicles_name_fulltext (name) WITH PARSER ngram'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE vehicles DROP INDEX vehicles_name_fulltext')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_vehicle_catalog_order_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
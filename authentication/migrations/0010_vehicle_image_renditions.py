@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0009_vehicle_name_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Rendições da Imagem'),
+        ),
+    ]
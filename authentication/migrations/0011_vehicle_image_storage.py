@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:02
+
+import authentication.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0010_vehicle_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehicle',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Imagem do veículo (formatos: JPG, PNG, etc.)', null=True, storage=authentication.storage.vehicle_image_storage, upload_to='vehicles/', verbose_name='Imagem do Veículo'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_vehicle_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sequences',
+            },
+        ),
+    ]
@@ -3,6 +3,9 @@ from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.contrib.auth.models import UserManager as BaseUserManager
 from django.utils import timezone
 from .utils import hash_password, is_valid_bcrypt_hash 
+from .renditions import srcset_by_format
+from .storage import vehicle_image_storage
+from .purchase_codes import next_purchase_code
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
@@ -15,6 +18,16 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def create_linked_user(self, username, **extra_fields):
+        """
+        Cria o usuário Django espelho de um Admin/Dealer sem senha própria:
+        a autenticação sempre usa o hash das tabelas admins/dealers
+        """
+        user = self.model(username=username, **extra_fields)
+        user.set_unusable_password()  # Não roda nenhum hasher
+        user.save(using=self._db)
+        return user
+
     def create_superuser(self, username, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
@@ -45,6 +58,11 @@ class CustomUser(AbstractUser):
     
     def __str__(self):
         return f"{self.username}"
+    
+    def get_session_auth_hash(self):
+        # Usuários reconstruídos do cache (user_cache.py) trazem o hash pronto, sem a senha
+        cached = getattr(self, '_session_auth_hash', None)
+        return cached if cached is not None else super().get_session_auth_hash()
 
 class Admin(models.Model):
     admin_name = models.CharField(max_length=10, primary_key=True)
@@ -87,6 +105,35 @@ class Dealer(models.Model):
     def __str__(self):
         return f"{self.dealer_name} ({self.dealer_id})"
 
+class LoginAttemptCounter(models.Model):
+    """
+    Contador de tentativas de login falhas (por usuário+IP ou por IP) com expiração.
+    Incrementado com UPDATE atômico pelo motor de bloqueio (lockout.py).
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'login_attempt_counters'
+    
+    def __str__(self):
+        return f"{self.key} ({self.count})"
+
+class Sequence(models.Model):
+    """
+    Sequência numérica nomeada, reservada em blocos com UPDATE atômico
+    (códigos de compra - purchase_codes.py)
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'sequences'
+    
+    def __str__(self):
+        return f"{self.name} ({self.value})"
+
 class Vehicle(models.Model):
     BODY_TYPE_CHOICES = [
         ('SUV', 'SUV'),
@@ -106,11 +153,14 @@ class Vehicle(models.Model):
     #CAMPO PARA IMAGEM
     image = models.ImageField(
         upload_to='vehicles/',
+        storage=vehicle_image_storage,  # Nome = SHA-256 do conteúdo (storage.py)
         verbose_name='Imagem do Veículo',
         blank=True,
         null=True,
         help_text='Imagem do veículo (formatos: JPG, PNG, etc.)'
     )
+    # Versões redimensionadas JPEG/WebP geradas no save (renditions.py)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Rendições da Imagem')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -118,9 +168,26 @@ class Vehicle(models.Model):
         db_table = 'vehicles'
         verbose_name = 'Veículo'
         verbose_name_plural = 'Veículos'
+        indexes = [
+            # Paginação por cursor em (brand, name, id)
+            models.Index(fields=['brand', 'name', 'id'], name='vehicles_catalog_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.brand})"
+    
+    @property
+    def image_srcset(self):
+        """srcset por formato das rendições: {'webp': 'url 320w, ...', 'jpeg': ...}"""
+        return srcset_by_format(self.image_renditions, self.image.storage.url)
+    
+    @property
+    def image_fallback_url(self):
+        """Menor rendição JPEG (src do <img>) ou, sem rendições, a imagem original"""
+        for item in (self.image_renditions or {}).get('items', []):
+            if item['format'] == 'jpeg':
+                return self.image.storage.url(item['path'])
+        return self.image.url if self.image else None
 
 #MODELO PARA REGISTRAR COMPRAS
 class Purchase(models.Model):
@@ -167,8 +234,6 @@ class Purchase(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.purchase_code:
-            # Gerar código único para a compra
-            import random
-            import string
-            self.purchase_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+            # Código único da sequência de compras, sem consultar a tabela (purchase_codes.py)
+            self.purchase_code = next_purchase_code()
         super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+
+# =============================================================================
+# PAGINAÇÃO POR CURSOR (KEYSET) DO CATÁLOGO
+# =============================================================================
+#
+# A página seguinte começa depois da chave (brand, name, id) do último item.
+# O cursor é essa chave serializada em base64 - o cliente só o repassa.
+
+CATALOG_ORDERING = ('brand', 'name', 'id')
+
+DEFAULT_PAGINATION_CONFIG = {
+    'PAGE_SIZE': 24,  # Itens por página quando o cliente não informa page_size
+    'MAX_PAGE_SIZE': 100,  # Limite para ?page_size=
+}
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou adulterado"""
+
+def _get_config():
+    return {**DEFAULT_PAGINATION_CONFIG, **getattr(settings, 'CATALOG_PAGINATION', {})}
+
+def encode_cursor(key):
+    """Chave de ordenação -> cursor opaco"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Cursor opaco -> chave de ordenação (None para a primeira página)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        brand, name, pk = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Cursor inválido')
+    if not isinstance(brand, str) or not isinstance(name, str) or not isinstance(pk, int):
+        raise InvalidCursor('Cursor inválido')
+    return (brand, name, pk)
+
+def get_page_size(request):
+    """Tamanho da página: ?page_size= limitado a MAX_PAGE_SIZE"""
+    config = _get_config()
+    try:
+        page_size = int(request.GET.get('page_size', config['PAGE_SIZE']))
+    except ValueError:
+        page_size = config['PAGE_SIZE']
+    return max(1, min(page_size, config['MAX_PAGE_SIZE']))
+
+def vehicle_sort_key(vehicle):
+    return (vehicle.brand, vehicle.name, vehicle.pk)
+
+def row_sort_key(row):
+    """Chave de ordenação de uma linha de .values()"""
+    return (row['brand'], row['name'], row['id'])
+
+def paginate_queryset(queryset, cursor, page_size, key=vehicle_sort_key):
+    """
+    Página do queryset a partir do cursor com um seek (WHERE (brand, name, id) > chave),
+    sem OFFSET. Retorna (itens, próximo cursor ou None). Para querysets .values()
+    use key=row_sort_key.
+    """
+    start = decode_cursor(cursor)
+    if start is not None:
+        brand, name, pk = start
+        queryset = queryset.filter(
+            Q(brand__gt=brand)
+            | Q(brand=brand, name__gt=name)
+            | Q(brand=brand, name=name, id__gt=pk)
+        )
+    items = list(queryset.order_by(*CATALOG_ORDERING)[:page_size + 1])
+    return _page(items, page_size, key)
+
+def _page(items, page_size, key):
+    if len(items) > page_size:
+        items = items[:page_size]
+        return items, encode_cursor(key(items[-1]))
+    return items, None
@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+# =============================================================================
+# CÓDIGOS DE COMPRA SEM COLISÃO
+# =============================================================================
+#
+# Cada compra recebe um número único de uma sequência no banco (tabela
+# sequences), reservado em blocos de BLOCK_SIZE por processo: um UPDATE a cada
+# bloco e nenhuma leitura antes de gravar a compra. O número passa por uma
+# rede de Feistel de 46 bits (permutação: números distintos -> valores
+# distintos), vira 9 caracteres em base 36 e ganha um caractere verificador
+# (Luhn mod 36): 10 caracteres, o max_length do campo. Os códigos antigos
+# (8 caracteres aleatórios) nunca colidem com os novos.
+#
+# As rodadas são HMAC-SHA256 com a chave secreta PURCHASE_CODES['KEY']: sem
+# ela, o código de um número não revela o do número seguinte. Não há chave
+# padrão - o app não sobe sem uma chave própria de ao menos MIN_KEY_LENGTH
+# caracteres (nem a SECRET_KEY serve). Trocar a chave depois que houver
+# compras muda a permutação e os novos códigos podem repetir os já emitidos.
+
+DEFAULT_PURCHASE_CODE_CONFIG = {
+    'BLOCK_SIZE': 100,  # Números reservados por processo a cada UPDATE na sequência
+    'KEY': None,  # Chave secreta da permutação (obrigatória) - não altere depois que houver compras
+}
+
+# Chave pública usada antes das rodadas HMAC: códigos gerados com ela são previsíveis
+INSECURE_KEYS = frozenset(['purchase-codes'])
+MIN_KEY_LENGTH = 32
+
+SEQUENCE_NAME = 'purchase_code'
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+ALPHABET_INDEX = {char: i for i, char in enumerate(ALPHABET)}
+PAYLOAD_LENGTH = 9
+HALF_BITS = 23  # 2 x 23 = 46 bits < 36^9: todo valor cabe em 9 caracteres
+HALF_MASK = (1 << HALF_BITS) - 1
+MAX_SEQUENCE = 1 << (2 * HALF_BITS)
+ROUNDS = 8
+
+def _get_config():
+    return {**DEFAULT_PURCHASE_CODE_CONFIG, **getattr(settings, 'PURCHASE_CODES', {})}
+
+def get_key():
+    """Chave da permutação; ImproperlyConfigured se ausente, pública ou curta demais"""
+    key = _get_config()['KEY']
+    if (
+        not key or key in INSECURE_KEYS or len(key) < MIN_KEY_LENGTH
+        # A SECRET_KEY de desenvolvimento está no repositório e a de produção é rotacionada
+        or key == settings.SECRET_KEY or key.startswith('django-insecure-')
+    ):
+        raise ImproperlyConfigured(
+            f"PURCHASE_CODES['KEY'] deve ser um segredo próprio (não a SECRET_KEY) de ao menos {MIN_KEY_LENGTH} caracteres "
+            '(variável de ambiente PURCHASE_CODE_KEY).'
+        )
+    return key
+
+@lru_cache(maxsize=8)
+def round_keys(key):
+    """Um HMAC-SHA256 por rodada, com chaves derivadas de `key`"""
+    master = key.encode('utf-8')
+    return tuple(
+        hmac.new(hmac.new(master, b'purchase-code-round-%d' % i, hashlib.sha256).digest(), digestmod=hashlib.sha256)
+        for i in range(ROUNDS)
+    )
+
+def _round(value, round_key):
+    mac = round_key.copy()
+    mac.update(value.to_bytes(3, 'big'))
+    return int.from_bytes(mac.digest()[:4], 'big') & HALF_MASK
+
+def permute(number, keys):
+    """Feistel: bijeção de [0, 2^46) nele mesmo"""
+    left, right = number >> HALF_BITS, number & HALF_MASK
+    for round_key in keys:
+        left, right = right, left ^ _round(right, round_key)
+    return (left << HALF_BITS) | right
+
+def unpermute(value, keys):
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_key in reversed(keys):
+        left, right = right ^ _round(left, round_key), left
+    return (left << HALF_BITS) | right
+
+def check_character(payload):
+    """Caractere verificador Luhn mod 36: detecta um caractere trocado e a maioria das transposições"""
+    total = 0
+    factor = 2
+    for char in reversed(payload):
+        addend = factor * ALPHABET_INDEX[char]
+        total += addend // 36 + addend % 36
+        factor = 3 - factor
+    return ALPHABET[-total % 36]
+
+def encode_purchase_code(number, keys=None):
+    """Número da sequência -> código de 10 caracteres"""
+    if not 0 <= number < MAX_SEQUENCE:
+        raise ValueError('Sequência de códigos de compra esgotada')
+    value = permute(number, keys or round_keys(get_key()))
+    chars = []
+    for _ in range(PAYLOAD_LENGTH):
+        value, digit = divmod(value, 36)
+        chars.append(ALPHABET[digit])
+    payload = ''.join(reversed(chars))
+    return payload + check_character(payload)
+
+def decode_purchase_code(code, keys=None):
+    """Código -> número da sequência; None se o código não é válido"""
+    code = code.upper()
+    if len(code) != PAYLOAD_LENGTH + 1 or any(char not in ALPHABET_INDEX for char in code):
+        return None
+    payload, check = code[:-1], code[-1]
+    if check_character(payload) != check:
+        return None
+    value = int(payload, 36)
+    if value >= MAX_SEQUENCE:
+        return None
+    return unpermute(value, keys or round_keys(get_key()))
+
+def allocate_numbers(size, name=SEQUENCE_NAME):
+    """Reserva `size` números consecutivos da sequência; retorna (início, fim)"""
+    from .models import Sequence
+
+    with transaction.atomic():
+        sequence = Sequence.objects.filter(name=name)
+        if not sequence.update(value=F('value') + size):
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, value=size)
+            except IntegrityError:
+                # Outro processo criou a sequência ao mesmo tempo
+                sequence.update(value=F('value') + size)
+        end = sequence.values_list('value', flat=True).get()
+    return end - size, end
+
+_block = {'next': 0, 'end': 0}
+_block_lock = threading.Lock()
+
+def next_purchase_code():
+    """
+    Próximo código de compra. Fora de transação usa o bloco do processo; dentro
+    de uma, reserva só o número usado, porque um rollback desfaria a reserva
+    de um bloco que o processo continuaria usando.
+    """
+    if connection.in_atomic_block:
+        number, _ = allocate_numbers(1)
+        return encode_purchase_code(number)
+
+    with _block_lock:
+        if _block['next'] >= _block['end']:
+            _block['next'], _block['end'] = allocate_numbers(_get_config()['BLOCK_SIZE'])
+        number = _block['next']
+        _block['next'] += 1
+    return encode_purchase_code(number)
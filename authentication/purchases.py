@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Vehicle
+from .purchase_codes import next_purchase_code
+
+# =============================================================================
+# BAIXA DE ESTOQUE ATÔMICA NA COMPRA
+# =============================================================================
+#
+# O estoque é decrementado pelo próprio banco com um UPDATE condicional:
+#   UPDATE vehicles SET quantity_available = quantity_available - 1
+#   WHERE id = %s AND quantity_available > 0
+# Compradores simultâneos disputam só o lock dessa linha; quem não consegue
+# decrementar não grava a compra. A versão do catálogo é trocada pelo signal
+# de Purchase no commit.
+
+class OutOfStock(Exception):
+    """Veículo sem unidades disponíveis no momento da compra"""
+
+def reserve_unit(vehicle_id):
+    """Decrementa uma unidade se houver estoque; True se a linha foi atualizada"""
+    reserved = Vehicle.objects.filter(pk=vehicle_id, quantity_available__gt=0).update(
+        quantity_available=F('quantity_available') - 1,
+        updated_at=timezone.now(),
+    )
+    return reserved == 1
+
+def place_purchase(purchase):
+    """
+    Grava uma compra (ainda não salva, com vehicle e dealer definidos) e dá
+    baixa no estoque na mesma transação. Levanta OutOfStock sem gravar nada
+    se o veículo esgotou.
+    """
+    if not purchase.purchase_code:
+        # Antes da transação: o código sai do bloco reservado pelo processo
+        purchase.purchase_code = next_purchase_code()
+    with transaction.atomic():
+        if not reserve_unit(purchase.vehicle_id):
+            raise OutOfStock('Este veículo não está mais disponível para compra.')
+        purchase.save()
+    return purchase
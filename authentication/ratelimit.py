@@ -0,0 +1,224 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .utils import get_client_ip_address, get_login_attempts_key
+from .instrumentation import timed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# =============================================================================
+# LIMITADOR DE TAXA (GCRA) COM ARMAZENAMENTO PLUGÁVEL
+# =============================================================================
+#
+# GCRA guarda um único valor por chave: o TAT ("theoretical arrival time").
+# Uma taxa de `limit` tentativas por `period` segundos libera uma tentativa a
+# cada period/limit segundos, com rajada de até `limit` tentativas.
+
+def gcra(tat, now, limit, period):
+    """
+    Aplica o GCRA ao TAT atual da chave.
+    Retorna (novo_tat, permitido, segundos_para_nova_tentativa).
+    """
+    emission_interval = period / limit
+    burst_tolerance = period - emission_interval
+    tat = max(tat or 0.0, now)
+    allow_at = tat - burst_tolerance
+    if now < allow_at:
+        return tat, False, allow_at - now
+    return tat + emission_interval, True, 0.0
+
+class BaseRateLimitStore:
+    """
+    Armazena o TAT por chave. update() precisa ser atômico em relação
+    às outras chamadas que a mesma store atende.
+    """
+    def update(self, key, func):
+        """
+        Lê o TAT da chave, chama func(tat) -> (novo_tat, resultado),
+        grava novo_tat e retorna resultado
+        """
+        raise NotImplementedError
+
+class LocalMemoryStore(BaseRateLimitStore):
+    """
+    LRU no processo - para implantações com um único worker
+    """
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        with self._lock:
+            new_tat, result = func(self._data.get(key))
+            self._data[key] = new_tat
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return result
+
+class SharedMemoryStore(BaseRateLimitStore):
+    """
+    Tabela hash de tamanho fixo em um arquivo mapeado em memória (mmap),
+    compartilhada pelos workers do gunicorn no mesmo host e protegida por flock.
+    Cada slot guarda (hash da chave, TAT); slots com TAT vencido são reaproveitados.
+    """
+    SLOT = struct.Struct('<Qd')
+    PROBES = 16
+
+    def __init__(self, path=None, slots=65536):
+        if fcntl is None:
+            raise ImproperlyConfigured('SharedMemoryStore requer fcntl (Linux/macOS).')
+        self.path = path or os.path.join(tempfile.gettempdir(), 'login_ratelimit.shm')
+        self.slots = slots
+        self._pid = None
+        self._file = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        # flock vale por descrição de arquivo aberta: cada processo abre o seu
+        if self._pid == os.getpid():
+            return
+        size = self.slots * self.SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        if os.fstat(fd).st_size < size:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    def _hash(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1  # 0 marca slot vazio
+
+    def _find_slot(self, key_hash, now):
+        """Slot da chave, ou o primeiro slot livre/vencido (senão o mais antigo) da sondagem"""
+        start = key_hash % self.slots
+        free, oldest, oldest_tat = None, None, None
+        for probe in range(self.PROBES):
+            index = (start + probe) % self.slots
+            slot_hash, tat = self.SLOT.unpack_from(self._map, index * self.SLOT.size)
+            if slot_hash == key_hash:
+                return index, tat
+            if free is None and (slot_hash == 0 or tat <= now):
+                free = index
+            if oldest is None or tat < oldest_tat:
+                oldest, oldest_tat = index, tat
+        return (free if free is not None else oldest), None
+
+    def update(self, key, func):
+        key_hash = self._hash(key)
+        with self._lock:
+            self._open()
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                index, tat = self._find_slot(key_hash, time.time())
+                new_tat, result = func(tat)
+                self.SLOT.pack_into(self._map, index * self.SLOT.size, key_hash, new_tat)
+                return result
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+class CacheStore(BaseRateLimitStore):
+    """
+    Fallback no cache do Django (por padrão o DatabaseCache).
+    get + set não é atômico: rajadas simultâneas podem passar uma ou outra tentativa.
+    """
+    def __init__(self, alias='default', ttl=3600):
+        self.alias = alias
+        self.ttl = ttl
+
+    def update(self, key, func):
+        cache = caches[self.alias]
+        cache_key = f'ratelimit:{key}'
+        new_tat, result = func(cache.get(cache_key))
+        cache.set(cache_key, new_tat, self.ttl)
+        return result
+
+class RateLimiter:
+    """
+    Limita rajadas de tentativas de login antes de qualquer acesso ao banco
+    """
+    def __init__(self, store, user_rate=(5, 60), ip_rate=(20, 60)):
+        self.store = store
+        self.user_rate = user_rate
+        self.ip_rate = ip_rate
+
+    def hit(self, key, limit, period):
+        """
+        Consome uma tentativa da chave. Retorna (permitido, segundos_para_nova_tentativa).
+        """
+        now = time.time()
+
+        def apply(tat):
+            new_tat, allowed, retry_after = gcra(tat, now, limit, period)
+            return new_tat, (allowed, retry_after)
+
+        return self.store.update(key, apply)
+
+    def check_login(self, request, username):
+        """
+        Consome uma tentativa do IP e do usuário+IP
+        """
+        ip_address = get_client_ip_address(request)
+        with timed('rate_limit'):
+            allowed, retry_after = self.hit(f'ip:{ip_address}', *self.ip_rate)
+            if allowed and username:
+                allowed, retry_after = self.hit(get_login_attempts_key(username, ip_address), *self.user_rate)
+
+        if allowed:
+            return {'limited': False}
+
+        retry_after = int(retry_after) + 1
+        return {
+            'limited': True,
+            'retry_after': retry_after,
+            'message': f'Muitas tentativas em pouco tempo. Tente novamente em {retry_after} segundos.'
+        }
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Limitador do processo, criado a partir de settings.LOGIN_RATE_LIMIT
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                config = getattr(settings, 'LOGIN_RATE_LIMIT', {})
+                store_class = import_string(config.get('STORE', 'authentication.ratelimit.LocalMemoryStore'))
+                _rate_limiter = RateLimiter(
+                    store_class(**config.get('OPTIONS', {})),
+                    user_rate=tuple(config.get('USER_RATE', (5, 60))),
+                    ip_rate=tuple(config.get('IP_RATE', (20, 60))),
+                )
+    return _rate_limiter
+
+@receiver(setting_changed)
+def reset_rate_limiter(setting, **kwargs):
+    """Recria o limitador quando LOGIN_RATE_LIMIT muda (override_settings nos testes)"""
+    global _rate_limiter
+    if setting == 'LOGIN_RATE_LIMIT':
+        _rate_limiter = None
@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# VERSÕES REDIMENSIONADAS (JPEG/WEBP) DE Vehicle.image
+# =============================================================================
+#
+# Ao salvar um veículo com imagem nova são geradas larguras fixas em cada
+# formato, gravadas em vehicles/renditions/ no mesmo storage do upload.
+# Vehicle.image_renditions guarda a origem e, por rendição, caminho e tamanho:
+#   {'source': 'vehicles/x.png', 'hash': <sha256 da origem>, 'items': [{'format': 'webp', 'width': 320, 'height': 180, 'path': ...}]}
+
+DEFAULT_RENDITION_CONFIG = {
+    'WIDTHS': [320, 640, 960],  # Larguras geradas (limitadas à largura original)
+    'FORMATS': ['webp', 'jpeg'],  # O primeiro formato é o preferido (<source> do <picture>)
+    'QUALITY': 80,
+    'DIRECTORY': 'vehicles/renditions',
+}
+
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+MIME_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# Extensões consideradas imagens de origem na varredura de MEDIA_ROOT (backfill)
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+def get_rendition_config():
+    return {**DEFAULT_RENDITION_CONFIG, **getattr(settings, 'VEHICLE_IMAGE_RENDITIONS', {})}
+
+def _prepare(image, fmt):
+    """JPEG não tem transparência: aplica fundo branco"""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA')
+    return image
+
+def _target_sizes(width, height, config):
+    """(largura, altura) de cada rendição de uma imagem width x height"""
+    for target in sorted({min(w, width) for w in config['WIDTHS']}):
+        yield target, max(1, round(height * target / width))
+
+def render_image(source, config=None):
+    """
+    Gera as rendições de um arquivo de imagem aberto.
+    Retorna [(formato, largura, altura, bytes)] sem gravar nada.
+    """
+    config = config or get_rendition_config()
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    results = []
+    for width, height in _target_sizes(original.width, original.height, config):
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for fmt in config['FORMATS']:
+            buffer = BytesIO()
+            _prepare(resized, fmt).save(buffer, PIL_FORMATS[fmt], quality=config['QUALITY'], optimize=True)
+            results.append((fmt, width, height, buffer.getvalue()))
+    return results
+
+def rendition_path(image_name, fmt, width, config=None):
+    config = config or get_rendition_config()
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"{config['DIRECTORY']}/{stem}-{width}w.{EXTENSIONS[fmt]}"
+
+def generate_renditions(image_field):
+    """
+    Gera e grava as rendições de um FieldFile (Vehicle.image) e retorna o
+    dicionário para Vehicle.image_renditions
+    """
+    config = get_rendition_config()
+    storage = image_field.storage
+    with storage.open(image_field.name, 'rb') as source:
+        content = source.read()
+    rendered = render_image(BytesIO(content), config)
+
+    items = []
+    for fmt, width, height, data in rendered:
+        path = rendition_path(image_field.name, fmt, width, config)
+        if storage.exists(path):
+            storage.delete(path)
+        path = storage.save(path, ContentFile(data))
+        items.append({'format': fmt, 'width': width, 'height': height, 'path': path})
+    return {'source': image_field.name, 'hash': hashlib.sha256(content).hexdigest(), 'items': items}
+
+def srcset_by_format(renditions, url):
+    """
+    {'webp': 'url 320w, url 640w', 'jpeg': ...} a partir de image_renditions;
+    url converte o caminho gravado em URL (storage.url)
+    """
+    srcsets = {}
+    for item in (renditions or {}).get('items', []):
+        srcsets.setdefault(item['format'], []).append(f"{url(item['path'])} {item['width']}w")
+    return {fmt: ', '.join(entries) for fmt, entries in srcsets.items()}
+
+def renditions_outdated(vehicle):
+    """Indica se as rendições não correspondem à imagem atual (sem ler arquivos)"""
+    renditions = vehicle.image_renditions or {}
+    if not vehicle.image:
+        return bool(renditions)
+    return renditions.get('source') != vehicle.image.name
+
+def update_vehicle_renditions(vehicle):
+    """
+    Regera as rendições se a imagem mudou desde a última geração (após o
+    commit do save). Grava com update() para não disparar um novo save/signal.
+    """
+    from .models import Vehicle
+
+    if not renditions_outdated(vehicle):
+        return
+    if not vehicle.image:
+        vehicle.image_renditions = {}
+        Vehicle.objects.filter(pk=vehicle.pk).update(image_renditions={})
+        return
+
+    try:
+        vehicle.image_renditions = generate_renditions(vehicle.image)
+    except (OSError, Image.DecompressionBombError) as e:
+        # Imagem ilegível: a listagem continua usando o original
+        logger.warning('Falha ao gerar rendições de %s: %s', vehicle.image.name, e)
+        return
+    Vehicle.objects.filter(pk=vehicle.pk).update(image_renditions=vehicle.image_renditions)
+
+# -----------------------------------------------------------------------------
+# Backfill em lote (comando backfill_renditions)
+# -----------------------------------------------------------------------------
+#
+# backfill_image roda nos processos do pool: recebe só caminhos e a
+# configuração, sem ORM. As rendições são gravadas em arquivo temporário e
+# renomeadas, então uma interrupção nunca deixa saída pela metade e a próxima
+# execução continua de onde parou, pulando as que já estão em dia.
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _oriented_size(path):
+    """Tamanho já com a rotação EXIF aplicada, lendo só o cabeçalho"""
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+            return height, width
+    return width, height
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def backfill_image(task):
+    """
+    Gera as rendições de MEDIA_ROOT/image_name que estiverem desatualizadas.
+    task = (image_name, media_root, config, recorded, force), onde recorded é o
+    image_renditions gravado (ou None). Retorna (image_name, status, resultado):
+    'generated'/'skipped' com o dicionário para image_renditions, ou 'error'
+    com a mensagem.
+
+    Pula sem decodificar quando todas as saídas são mais novas que a origem;
+    se a origem foi só tocada (cópia, restore), o hash igual ao gravado evita
+    regerar.
+    """
+    image_name, media_root, config, recorded, force = task
+    source = os.path.join(media_root, image_name)
+    try:
+        source_mtime = os.stat(source).st_mtime
+        width, height = _oriented_size(source)
+        items = [
+            {'format': fmt, 'width': w, 'height': h, 'path': rendition_path(image_name, fmt, w, config)}
+            for w, h in _target_sizes(width, height, config)
+            for fmt in config['FORMATS']
+        ]
+        outputs = [os.path.join(media_root, item['path']) for item in items]
+        known_hash = (recorded or {}).get('hash') if (recorded or {}).get('source') == image_name else None
+
+        if not force and all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in outputs):
+            return image_name, 'skipped', {'source': image_name, 'hash': known_hash or file_digest(source), 'items': items}
+
+        digest = file_digest(source)
+        if not force and digest == known_hash and all(os.path.exists(p) for p in outputs):
+            for path in outputs:
+                os.utime(path)
+            return image_name, 'skipped', {'source': image_name, 'hash': digest, 'items': items}
+
+        with open(source, 'rb') as f:
+            rendered = render_image(f, config)
+        for (_, _, _, data), path in zip(rendered, outputs):
+            _write_atomic(path, data)
+    except (OSError, Image.DecompressionBombError) as e:
+        return image_name, 'error', str(e)
+    return image_name, 'generated', {'source': image_name, 'hash': digest, 'items': items}
+
+def scan_source_images(media_root, config=None):
+    """Nomes (relativos a MEDIA_ROOT) das imagens em vehicles/, sem as rendições"""
+    config = config or get_rendition_config()
+    root = os.path.join(media_root, 'vehicles')
+    renditions_dir = os.path.normpath(os.path.join(media_root, config['DIRECTORY']))
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = [d for d in subdirs if os.path.normpath(os.path.join(directory, d)) != renditions_dir]
+        for filename in files:
+            if os.path.splitext(filename)[1].lower() in SOURCE_EXTENSIONS:
+                yield os.path.relpath(os.path.join(directory, filename), media_root).replace(os.sep, '/')
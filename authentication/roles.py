@@ -0,0 +1,120 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from .user_cache import LocalUserCache
+
+# =============================================================================
+# RESOLUÇÃO DE PAPÉIS (GRUPOS) DO USUÁRIO
+# =============================================================================
+#
+# Os nomes dos grupos são carregados uma única vez por requisição e, com
+# settings.ROLE_SESSION_CACHE, guardados na sessão. O login sempre regrava a
+# entrada da sessão com os grupos sincronizados por get_or_create_user.
+#
+# A entrada da sessão guarda as versões de papéis vigentes quando foi gravada:
+# 'roles:version:<id>' (trocada pelos signals quando os grupos do usuário mudam)
+# e 'roles:version' (grupo alterado/removido ou usuários desconhecidos). Se
+# alguma mudou, os grupos são relidos do banco.
+#
+# As versões ficam também em um LRU do processo por ROLE_VERSIONS_LOCAL_TTL
+# segundos: a requisição comum não consulta o cache (uma query no
+# DatabaseCache). Trocas feitas no próprio processo valem na hora; nos demais
+# workers, em até ROLE_VERSIONS_LOCAL_TTL segundos.
+
+ROLE_SESSION_KEY = '_auth_roles'
+ROLES_VERSION_KEY = 'roles:version'
+LOCAL_VERSIONS_MAX_ENTRIES = 4096
+
+_local_versions = None
+
+def _get_local_versions():
+    global _local_versions
+    if _local_versions is None:
+        _local_versions = LocalUserCache(LOCAL_VERSIONS_MAX_ENTRIES, getattr(settings, 'ROLE_VERSIONS_LOCAL_TTL', 5))
+    return _local_versions
+
+@receiver(setting_changed)
+def reset_local_versions(setting, **kwargs):
+    """Recria o LRU quando ROLE_VERSIONS_LOCAL_TTL muda (override_settings nos testes)"""
+    global _local_versions
+    if setting == 'ROLE_VERSIONS_LOCAL_TTL':
+        _local_versions = None
+
+def _user_version_key(user_id):
+    return f'{ROLES_VERSION_KEY}:{user_id}'
+
+def bump_roles_version(user_id=None):
+    """Invalida os papéis em sessão de um usuário (ou de todos, sem user_id)"""
+    key = ROLES_VERSION_KEY if user_id is None else _user_version_key(user_id)
+    version = time.time_ns()
+    cache.set(key, version, None)
+    _get_local_versions().set(key, version)
+
+def get_roles_versions(user_id):
+    """[versão global, versão do usuário] - do LRU local ou em uma leitura do cache"""
+    local = _get_local_versions()
+    keys = [ROLES_VERSION_KEY, _user_version_key(user_id)]
+    versions = {key: local.get(key) for key in keys}
+    missing = [key for key in keys if versions[key] is None]
+    if missing:
+        versions.update(cache.get_many(missing))
+        for key in missing:
+            if versions[key] is None:
+                version = time.time_ns()
+                # Chave ausente (nunca criada ou descartada) gera versão nova: a sessão é relida
+                versions[key] = version if cache.add(key, version, None) else cache.get(key, version)
+            local.set(key, versions[key])
+    return [versions[key] for key in keys]
+
+def get_user_roles(user):
+    """
+    Nomes dos grupos do usuário - uma query por objeto user, depois cache no próprio objeto
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, '_cached_roles', None)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        user._cached_roles = roles
+    return roles
+
+def _session_cache_enabled():
+    return getattr(settings, 'ROLE_SESSION_CACHE', True)
+
+def get_request_roles(request):
+    """
+    Nomes dos grupos do usuário da requisição, usando a sessão quando disponível
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return frozenset()
+    if getattr(user, '_cached_roles', None) is not None:
+        return user._cached_roles
+
+    if _session_cache_enabled():
+        versions = get_roles_versions(user.pk)
+        cached = request.session.get(ROLE_SESSION_KEY)
+        if cached and cached.get('user_id') == user.pk and cached.get('versions') == versions:
+            user._cached_roles = frozenset(cached['roles'])
+            return user._cached_roles
+
+    roles = get_user_roles(user)
+    remember_roles(request, user)
+    return roles
+
+def remember_roles(request, user):
+    """
+    Grava os papéis do usuário na sessão (chamado após o login)
+    """
+    if _session_cache_enabled():
+        request.session[ROLE_SESSION_KEY] = {
+            'user_id': user.pk,
+            'roles': sorted(get_user_roles(user)),
+            'versions': get_roles_versions(user.pk),
+        }
+
+def has_role(request, role):
+    """Indica se o usuário da requisição pertence ao grupo"""
+    return role in get_request_roles(request)
@@ -0,0 +1,146 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from .catalog import get_catalog_snapshot, get_catalog_version
+from .facets import build_facets, cells_from_queryset, cells_from_vehicles
+
+# =============================================================================
+# BUSCA DE VEÍCULOS POR NOME
+# =============================================================================
+#
+# No MySQL a busca usa o índice FULLTEXT (parser ngram) de vehicles.name
+# (migration 0009) com MATCH ... AGAINST. Nos demais bancos (SQLite dos testes)
+# usa um índice de trigramas em memória, montado a partir do snapshot do
+# catálogo e refeito quando a versão do catálogo muda (signals de Vehicle).
+
+DEFAULT_SEARCH_CONFIG = {
+    'BACKEND': 'auto',  # 'auto' (fulltext no MySQL), 'fulltext' ou 'trigram'
+    'MIN_SIMILARITY': 0.5,  # Fração mínima dos trigramas da busca presentes no nome
+}
+
+def _get_config():
+    return {**DEFAULT_SEARCH_CONFIG, **getattr(settings, 'VEHICLE_SEARCH', {})}
+
+def normalize(text):
+    """Minúsculas e sem acentos ('Cerâmica' -> 'ceramica')"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text):
+    return re.findall(r'\w+', normalize(text))
+
+def trigrams(text):
+    """Trigramas de cada palavra, com o início marcado como no pg_trgm ('  a', ' ab', ...)"""
+    grams = set()
+    for word in tokenize(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama -> posições dos veículos na lista do snapshot
+    """
+    def __init__(self, vehicles):
+        self.vehicles = vehicles
+        self.names = [normalize(vehicle.name) for vehicle in vehicles]
+        self.postings = defaultdict(list)
+        for position, vehicle in enumerate(vehicles):
+            for gram in trigrams(vehicle.name):
+                self.postings[gram].append(position)
+
+    def search(self, query, min_similarity):
+        """
+        Veículos ranqueados: primeiro os que contêm o texto buscado, depois
+        por fração de trigramas em comum (mantendo a ordem do catálogo no empate)
+        """
+        needle = normalize(query).strip()
+        query_grams = trigrams(query)
+        if not needle or not query_grams:
+            return []
+
+        hits = defaultdict(int)
+        for gram in query_grams:
+            for position in self.postings.get(gram, ()):
+                hits[position] += 1
+
+        ranked = []
+        for position, count in hits.items():
+            score = count / len(query_grams)
+            contains = needle in self.names[position]
+            if contains or score >= min_similarity:
+                ranked.append((not contains, -score, position))
+        ranked.sort()
+        return [self.vehicles[position] for _, _, position in ranked]
+
+_trigram_index = {'version': None, 'index': None}
+_trigram_lock = threading.Lock()
+
+def get_trigram_index():
+    """Índice da versão atual do catálogo (refeito após mudanças em Vehicle)"""
+    version = get_catalog_version()
+    with _trigram_lock:
+        if _trigram_index['version'] != version:
+            _trigram_index['index'] = TrigramIndex(get_catalog_snapshot()['vehicles'])
+            _trigram_index['version'] = version
+        return _trigram_index['index']
+
+def _use_fulltext():
+    backend = _get_config()['BACKEND']
+    if backend == 'auto':
+        return connection.vendor == 'mysql'
+    return backend == 'fulltext'
+
+def _fulltext_matches(query):
+    from .models import Vehicle
+
+    # Modo booleano: todas as palavras obrigatórias (+palavra), ranqueado pela relevância
+    terms = ' '.join(f'+{token}' for token in tokenize(query))
+    return Vehicle.objects.annotate(
+        relevance=RawSQL('MATCH (name) AGAINST (%s IN BOOLEAN MODE)', [terms])
+    ).filter(relevance__gt=0)
+
+def _filter_list(vehicles, brand, body_type):
+    if brand:
+        vehicles = [vehicle for vehicle in vehicles if vehicle.brand == brand]
+    if body_type:
+        vehicles = [vehicle for vehicle in vehicles if vehicle.body_type == body_type]
+    return vehicles
+
+def search_catalog(query='', brand=None, body_type=None, with_facets=False):
+    """
+    Veículos que correspondem à busca, ranqueados, com os filtros de marca e
+    carroceria (sem texto, o catálogo filtrado na ordem normal). Com
+    with_facets retorna (veículos, facetas) - as facetas partem dos veículos
+    que casam com o texto, antes dos filtros.
+    """
+    has_text = bool(tokenize(query))
+    cells = None
+
+    if has_text and _use_fulltext():
+        matches = _fulltext_matches(query)
+        if with_facets:
+            cells = cells_from_queryset(matches)
+        if brand:
+            matches = matches.filter(brand=brand)
+        if body_type:
+            matches = matches.filter(body_type=body_type)
+        vehicles = list(matches.order_by('-relevance', 'brand', 'name', 'id'))
+    else:
+        if has_text:
+            matches = get_trigram_index().search(query, _get_config()['MIN_SIMILARITY'])
+            if with_facets:
+                cells = cells_from_vehicles(matches)
+        else:
+            snapshot = get_catalog_snapshot()
+            matches = snapshot['vehicles']
+            cells = snapshot['facet_cells']
+        vehicles = _filter_list(matches, brand, body_type)
+
+    if with_facets:
+        return vehicles, build_facets(cells, brand, body_type)
+    return vehicles
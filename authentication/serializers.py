@@ -1,18 +1,77 @@
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 from .models import Purchase, Vehicle, Dealer
+from .purchases import place_purchase
+from .renditions import srcset_by_format
 
 class VehicleSerializer(serializers.ModelSerializer):
+    # srcset por formato das rendições redimensionadas ({'webp': ..., 'jpeg': ...})
+    image_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Vehicle
-        fields = ['id', 'name', 'brand', 'body_type', 'quantity_available', 'image']
+        fields = ['id', 'name', 'brand', 'body_type', 'quantity_available', 'image', 'image_srcset']
         read_only_fields = ['id']
 
+    def get_image_srcset(self, obj):
+        return obj.image_srcset
+
 class DealerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dealer
         fields = ['dealer_id', 'dealer_name', 'is_public']
         read_only_fields = ['dealer_id']
 
+# =============================================================================
+# SERIALIZAÇÃO RÁPIDA (SOMENTE LEITURA) PARA AS APIs PÚBLICAS
+# =============================================================================
+
+class ValuesSerializer:
+    """
+    Serializa linhas de .values() com os mesmos campos e formato JSON do
+    ModelSerializer correspondente, sem instanciar modelos nem campos do DRF
+    """
+    fields = ()
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields)
+
+    def to_representation(self, row):
+        return row
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.rows]
+
+class VehicleValuesSerializer(ValuesSerializer):
+    # image_srcset é montado a partir de image_renditions
+    fields = [field for field in VehicleSerializer.Meta.fields if field != 'image_srcset'] + ['image_renditions']
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        storage = Vehicle._meta.get_field('image').storage
+        if isinstance(storage, FileSystemStorage) and storage.base_url.endswith('/'):
+            # Mesmo resultado de FileSystemStorage.url() sem o urljoin por linha
+            base_url = storage.base_url
+            self.image_url = lambda name: base_url + filepath_to_uri(name).lstrip('/')
+        else:
+            self.image_url = storage.url
+
+    def to_representation(self, row):
+        # Como o ImageField do DRF sem request no contexto: URL relativa ou None
+        image = row['image']
+        row['image'] = self.image_url(image) if image else None
+        row['image_srcset'] = srcset_by_format(row.pop('image_renditions'), self.image_url)
+        return row
+
+class DealerValuesSerializer(ValuesSerializer):
+    fields = DealerSerializer.Meta.fields
+
 class PurchaseSerializer(serializers.ModelSerializer):
     vehicle_name = serializers.CharField(source='vehicle.name', read_only=True)
     dealer_name = serializers.CharField(source='dealer.dealer_name', read_only=True)
@@ -66,18 +125,13 @@ class PurchaseSerializer(serializers.ModelSerializer):
         validated_data.pop('vehicle_id', None)
         validated_data.pop('dealer_id', None)
         
-        # Criar a compra com os objetos relacionados
-        purchase = Purchase.objects.create(
+        # Criar a compra e dar baixa no estoque na mesma transação (UPDATE condicional);
+        # OutOfStock se o veículo esgotou depois da validação
+        return place_purchase(Purchase(
             vehicle=vehicle,
             dealer=dealer,
             **validated_data
-        )
-        
-        # Atualizar estoque
-        vehicle.quantity_available -= 1
-        vehicle.save()
-        
-        return purchase
+        ))
 
 class PurchaseDetailSerializer(serializers.ModelSerializer):
     """
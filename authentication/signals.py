@@ -0,0 +1,71 @@
+from django.contrib.auth.models import Group
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .backends import clear_group_cache
+from .catalog import bump_catalog_version, bump_dealers_version
+from .models import CustomUser, Dealer, Purchase, Vehicle
+from .renditions import renditions_outdated, update_vehicle_renditions
+from .roles import bump_roles_version
+from .suggest import vehicle_deleted, vehicle_saved
+from .user_cache import invalidate_user
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, **kwargs):
+    """Invalida o cache de grupos do backend e os papéis em sessão quando um grupo muda"""
+    clear_group_cache()
+    transaction.on_commit(bump_roles_version)
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    """Invalida o snapshot do usuário em cache (de novo no commit, contra leituras concorrentes)"""
+    pk = instance.pk
+    invalidate_user(pk)
+    transaction.on_commit(lambda: invalidate_user(pk))
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalida os papéis em sessão quando os grupos de usuários mudam (o snapshot não tem grupos)"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        transaction.on_commit(lambda: bump_roles_version(instance.pk))
+    elif pk_set:
+        transaction.on_commit(lambda: [bump_roles_version(user_id) for user_id in pk_set])
+    else:
+        # group.user_set.clear(): não sabemos quais usuários - invalida os papéis de todos
+        transaction.on_commit(bump_roles_version)
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, user, **kwargs):
+    """Logout descarta o snapshot do usuário"""
+    if user is not None:
+        invalidate_user(user.pk)
+
+@receiver([post_save, post_delete], sender=Vehicle)
+@receiver([post_save, post_delete], sender=Purchase)
+def catalog_changed(sender, **kwargs):
+    """Nova versão do catálogo quando veículos ou compras mudam (após o commit)"""
+    transaction.on_commit(bump_catalog_version)
+
+@receiver([post_save, post_delete], sender=Dealer)
+def dealers_changed(sender, **kwargs):
+    """Nova versão da lista de concessionárias (ETags das páginas públicas)"""
+    transaction.on_commit(bump_dealers_version)
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_image_changed(sender, instance, raw=False, **kwargs):
+    """Gera as rendições JPEG/WebP após o commit, só quando a imagem do veículo mudou"""
+    if not raw and renditions_outdated(instance):
+        transaction.on_commit(lambda: update_vehicle_renditions(instance))
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_saved_handler(sender, instance, **kwargs):
+    """Atualiza o índice de sugestões do processo (após o commit)"""
+    transaction.on_commit(lambda: vehicle_saved(instance.pk, instance.name))
+
+@receiver(post_delete, sender=Vehicle)
+def vehicle_deleted_handler(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: vehicle_deleted(pk))
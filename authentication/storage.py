@@ -0,0 +1,69 @@
+import hashlib
+import os
+import uuid
+from django.core.files.storage import FileSystemStorage, storages
+
+# =============================================================================
+# STORAGE ENDEREÇADO POR CONTEÚDO DAS IMAGENS DE VEÍCULOS
+# =============================================================================
+#
+# Arquivos gravados diretamente em vehicles/ recebem o nome do SHA-256 do
+# conteúdo (vehicles/<sha256>.jpg): reenviar a mesma imagem não cria outra
+# cópia e, como o nome muda sempre que o conteúdo muda, a URL pode ser
+# servida com cache imutável (pelo servidor web; ver web_project/urls.py).
+# Subdiretórios (vehicles/renditions/) mantêm o nome recebido.
+#
+# O arquivo é gravado com um nome temporário e ligado (hard link) ao nome
+# final: se um upload simultâneo da mesma imagem chegou antes, o link falha
+# com FileExistsError e o arquivo existente - mesmo hash, mesmos bytes - é
+# reaproveitado, sem gerar um nome com sufixo.
+
+# Mesma imagem com extensões diferentes vira um único arquivo
+EXTENSION_ALIASES = {'.jpeg': '.jpg', '.tif': '.tiff'}
+
+def content_digest(content):
+    """SHA-256 de um File/UploadedFile, lido em chunks"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+def hashed_name(directory, digest, original_name):
+    """vehicles + sha256 + foto.JPEG -> vehicles/<sha256>.jpg"""
+    ext = os.path.splitext(original_name)[1].lower()
+    return f'{directory}/{digest}{EXTENSION_ALIASES.get(ext, ext)}'
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que nomeia pelo hash do conteúdo os arquivos salvos em
+    `directory` e grava bytes idênticos uma única vez
+    """
+    def __init__(self, directory='vehicles', **kwargs):
+        self.directory = directory
+        super().__init__(**kwargs)
+
+    def is_content_addressed(self, name):
+        return os.path.dirname(name).replace(os.sep, '/') == self.directory
+
+    def _save(self, name, content):
+        if not self.is_content_addressed(name):
+            return super()._save(name, content)
+        name = hashed_name(self.directory, content_digest(content), name)
+        if self.exists(name):
+            # Mesmo conteúdo já armazenado: reaproveita o arquivo
+            return name
+        temp_name = super()._save(f'{self.directory}/.upload-{uuid.uuid4().hex}', content)
+        try:
+            os.link(self.path(temp_name), self.path(name))
+        except FileExistsError:
+            # Upload simultâneo dos mesmos bytes gravou o arquivo primeiro
+            pass
+        finally:
+            os.remove(self.path(temp_name))
+        return name
+
+def vehicle_image_storage():
+    """Storage de Vehicle.image (alias 'vehicle_images' de STORAGES)"""
+    return storages['vehicle_images']
@@ -0,0 +1,140 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from .catalog import get_catalog_version
+from .search import tokenize
+
+# =============================================================================
+# SUGESTÕES DE NOME DE VEÍCULO (TYPEAHEAD)
+# =============================================================================
+#
+# Array ordenado de chaves (texto normalizado a partir de cada palavra do nome,
+# id) consultado com bisect: 'cro' encontra 'Corolla Cross'. Os signals de
+# Vehicle atualizam o índice do processo na hora; alterações feitas por outros
+# processos são percebidas pela versão do catálogo, verificada no máximo a
+# cada REFRESH_INTERVAL segundos - nas demais consultas não há I/O.
+
+DEFAULT_SUGGEST_CONFIG = {
+    'LIMIT': 10,  # Sugestões por consulta quando o cliente não informa limit
+    'MAX_LIMIT': 50,
+    'REFRESH_INTERVAL': 30,  # Segundos entre verificações da versão do catálogo
+}
+
+def _get_config():
+    return {**DEFAULT_SUGGEST_CONFIG, **getattr(settings, 'VEHICLE_SUGGEST', {})}
+
+def _name_keys(name):
+    """Uma chave por palavra: o nome normalizado a partir dela"""
+    words = tokenize(name)
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+class SuggestIndex:
+    """
+    Índice de prefixos dos nomes dos veículos
+    """
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._keys = sorted(
+            (key, pk) for pk, name in entries for key in self._register(pk, name)
+        )
+
+    def _register(self, pk, name):
+        self._names[pk] = name
+        return _name_keys(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, pk, name):
+        """Inclui ou atualiza o nome de um veículo"""
+        with self._lock:
+            self._remove(pk)
+            for key in self._register(pk, name):
+                insort(self._keys, (key, pk))
+
+    def remove(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def _remove(self, pk):
+        name = self._names.pop(pk, None)
+        if name is None:
+            return
+        for key in _name_keys(name):
+            position = bisect_left(self._keys, (key, pk))
+            if position < len(self._keys) and self._keys[position] == (key, pk):
+                del self._keys[position]
+
+    def suggest(self, prefix, limit=10):
+        """Nomes distintos com alguma palavra começando pelo prefixo, em ordem alfabética"""
+        needle = ' '.join(tokenize(prefix))
+        if not needle:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (needle,))
+            while position < len(self._keys) and len(results) < limit:
+                key, pk = self._keys[position]
+                if not key.startswith(needle):
+                    break
+                name = self._names[pk]
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+                position += 1
+        return results
+
+_state = {'index': None, 'version': None, 'checked_at': 0.0}
+_state_lock = threading.Lock()
+
+def _build_index():
+    from .models import Vehicle
+
+    return SuggestIndex(Vehicle.objects.values_list('id', 'name').iterator())
+
+def get_suggest_index():
+    """
+    Índice do processo: montado na primeira consulta e refeito quando a versão
+    do catálogo mudou por escrita de outro processo
+    """
+    now = time.monotonic()
+    if _state['index'] is not None and now - _state['checked_at'] < _get_config()['REFRESH_INTERVAL']:
+        return _state['index']
+
+    with _state_lock:
+        if _state['index'] is None or now - _state['checked_at'] >= _get_config()['REFRESH_INTERVAL']:
+            version = get_catalog_version()
+            if _state['index'] is None or version != _state['version']:
+                _state['index'] = _build_index()
+                _state['version'] = version
+            _state['checked_at'] = now
+        return _state['index']
+
+def vehicle_saved(pk, name):
+    """Atualização incremental após o commit (signals)"""
+    if _state['index'] is not None:
+        _state['index'].add(pk, name)
+        _state['version'] = get_catalog_version()
+
+def vehicle_deleted(pk):
+    if _state['index'] is not None:
+        _state['index'].remove(pk)
+        _state['version'] = get_catalog_version()
+
+def suggest_vehicle_names(prefix, limit=None):
+    """Nomes de veículos para o prefixo digitado"""
+    config = _get_config()
+    limit = max(1, min(limit or config['LIMIT'], config['MAX_LIMIT']))
+    return get_suggest_index().suggest(prefix, limit)
+
+@receiver(setting_changed)
+def reset_suggest_index(setting, **kwargs):
+    """Descarta o índice quando VEHICLE_SUGGEST muda (override_settings nos testes)"""
+    if setting == 'VEHICLE_SUGGEST':
+        with _state_lock:
+            _state.update(index=None, version=None, checked_at=0.0)
@@ -1,8 +1,11 @@
 # authentication/test_api.py
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Vehicle, Dealer
+from .models import Vehicle, Dealer, Purchase
+from .serializers import DealerSerializer, VehicleSerializer
 
 class PurchaseAPITestCase(TestCase):
     def setUp(self):
@@ -37,4 +40,56 @@ class PurchaseAPITestCase(TestCase):
         }
         response = self.client.post('/api/purchase/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertTrue(response.data['success'])
\ No newline at end of file
+        self.assertTrue(response.data['success'])
+    
+    def test_purchase_api_refuses_past_stock(self):
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(quantity_available=1)
+        data = {
+            'customer_name': 'Cliente Teste',
+            'gender': 'M',
+            'email': 'cliente@teste.com',
+            'phone': '11999999999',
+            'monthly_salary': '5000.00',
+            'dealer_id': self.dealer.dealer_id,
+            'vehicle_id': self.vehicle.id
+        }
+        self.assertEqual(self.client.post('/api/purchase/', data, format='json').status_code, status.HTTP_201_CREATED)
+        # Sem estoque a validação já recusa (409 só quando esgota entre a validação e o UPDATE)
+        response = self.client.post('/api/purchase/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('vehicle_id', response.data['errors'])
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).quantity_available, 0)
+        self.assertEqual(Purchase.objects.filter(vehicle=self.vehicle).count(), 1)
+    
+    def test_public_vehicles_api_cursor_pagination(self):
+        Vehicle.objects.create(name="Carro Teste", brand="TOYOTA", body_type="SUV", quantity_available=1)
+        Vehicle.objects.create(name="Dolphin", brand="BYD", body_type="HATCHBACK", quantity_available=2)
+        
+        names, cursor = [], ''
+        while cursor is not None:
+            response = self.client.get('/api/vehicles/public/', {'page_size': 2, 'cursor': cursor})
+            self.assertEqual(response.data['count'], 3)
+            self.assertLessEqual(response.data['page_count'], 2)
+            names += [(v['brand'], v['name']) for v in response.data['vehicles']]
+            cursor = response.data['next_cursor']
+        
+        self.assertEqual(names, [('BYD', 'Dolphin'), ('TOYOTA', 'Carro Teste'), ('TOYOTA', 'Carro Teste')])
+        response = self.client.get('/api/vehicles/public/', {'cursor': 'inválido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_public_apis_match_model_serializers_in_one_query(self):
+        Vehicle.objects.create(name="Com Imagem", brand="BYD", body_type="SUV", quantity_available=1, image="vehicles/a b.jpg")
+        
+        # Além da leitura da versão do catálogo (ETag) e do resumo já em cache
+        # (total em 'count'), uma única query nos dados
+        self.client.get('/api/vehicles/public/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/vehicles/public/')
+        self.assertEqual(sum(f'FROM {connection.ops.quote_name("vehicles")}' in query['sql'] for query in queries.captured_queries), 1)
+        expected = VehicleSerializer(Vehicle.objects.order_by('brand', 'name', 'id'), many=True).data
+        self.assertEqual(response.json()['vehicles'], [dict(item) for item in expected])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/dealers/public/')
+        self.assertEqual(sum(f'FROM {connection.ops.quote_name("dealers")}' in query['sql'] for query in queries.captured_queries), 1)
+        self.assertEqual(response.json()['dealers'], [dict(DealerSerializer(self.dealer).data)])
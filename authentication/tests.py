@@ -1,3 +1,726 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from .catalog import bump_catalog_version
+from .backends import CustomAuthBackend, clear_group_cache, get_principals
+from .dbcache import SweptDatabaseCache, purge_expired_counters
+from .hash_pool import HashPool, HashPoolSaturated, get_hash_pool
+from .http_cache import serve_immutable_media
+from .instrumentation import auth_metrics
+from .models import Admin, CustomUser, Dealer, LoginAttemptCounter, Purchase, Vehicle
+from .purchase_codes import decode_purchase_code, encode_purchase_code, get_key, next_purchase_code, round_keys
+from .purchases import OutOfStock, place_purchase, reserve_unit
+from .ratelimit import LocalMemoryStore, RateLimiter, SharedMemoryStore
+from .roles import ROLE_SESSION_KEY
+from .search import search_catalog
+from .storage import vehicle_image_storage
+from .suggest import suggest_vehicle_names
+from .utils import check_password, get_bcrypt_cost, hash_password
+from .views import login_view_async
 
-# Create your tests here.
+# URLconf dos testes do login assíncrono (urls.py escolhe a view ao ser importado)
+urlpatterns = [
+    path('login/', login_view_async, name='login'),
+    path('', include('web_project.urls')),
+]
+
+
+class HashPoolTestCase(SimpleTestCase):
+    def test_acheck_password(self):
+        pool = HashPool(max_workers=2, max_pending=2)
+        hashed = hash_password('dealer123')
+        self.assertTrue(asyncio.run(pool.acheck_password('dealer123', hashed)))
+        self.assertFalse(asyncio.run(pool.acheck_password('errada', hashed)))
+        self.assertEqual(pool.stats()['completed'], 2)
+
+    def test_rejects_when_queue_is_full(self):
+        pool = HashPool(max_workers=1, max_pending=1)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        waiting = pool.submit(release.wait)
+
+        with self.assertRaises(HashPoolSaturated):
+            pool.submit(release.wait)
+        self.assertEqual(pool.stats()['rejected'], 1)
+
+        release.set()
+        running.result()
+        waiting.result()
+        self.assertEqual(pool.stats()['active'] + pool.stats()['queued'], 0)
+
+
+class PrincipalLookupTestCase(TestCase):
+    def setUp(self):
+        Admin.objects.create(admin_name='D001', passwd='test')
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd='dealer123')
+
+    def test_single_query_with_admin_first(self):
+        with self.assertNumQueries(1):
+            principals = list(get_principals('D001'))
+        self.assertEqual([role for role, hashed in principals], ['Admin', 'Dealer'])
+        self.assertEqual(list(get_principals('nobody')), [])
+
+    def test_get_user_is_a_plain_pk_lookup(self):
+        user = CustomUser.objects.create(username='D001')
+        with CaptureQueriesContext(connection) as queries:
+            loaded = CustomAuthBackend().get_user(user.pk)
+        self.assertEqual(loaded.username, 'D001')
+        table = connection.ops.quote_name(CustomUser._meta.db_table)
+        user_queries = [query['sql'] for query in queries if table in query['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertNotIn('EXISTS', user_queries[0].upper())
+
+    def test_get_user_served_from_local_cache(self):
+        user = CustomUser.objects.create(username='D001')
+        backend = CustomAuthBackend()
+        backend.get_user(user.pk)
+
+        with self.assertNumQueries(0):
+            cached = backend.get_user(user.pk)
+        self.assertEqual((cached.pk, cached.username), (user.pk, 'D001'))
+
+        user.is_active = False
+        user.save()
+        self.assertFalse(backend.get_user(user.pk).is_active)
+
+    def test_snapshot_keeps_password_out_and_sessions_valid(self):
+        clear_group_cache()
+        Dealer.objects.filter(dealer_id='D001').update(dlpasswd=hash_password('dealer123', rounds=4))
+        Admin.objects.filter(admin_name='D001').delete()
+        self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+        user = CustomUser.objects.get(username='D001')
+
+        backend = CustomAuthBackend()
+        backend.get_user(user.pk)
+        with self.assertNumQueries(0):
+            cached = backend.get_user(user.pk)
+            self.assertEqual(cached.get_session_auth_hash(), user.get_session_auth_hash())
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertEqual(cached.password, user.password)
+        # DatabaseCache como cache padrão: sem camada compartilhada
+        self.assertIsNone(cache.get(f'auth_user_snapshot:{user.pk}'))
+        self.assertEqual(self.client.get('/dealer/dashboard/').status_code, 200)
+
+
+class GroupSyncTestCase(TestCase):
+    def setUp(self):
+        clear_group_cache()
+        self.backend = CustomAuthBackend()
+
+    def test_repeated_login_does_not_write(self):
+        user = self.backend.get_or_create_user('D001', 'Dealer')
+        self.assertEqual(list(user.groups.values_list('name', flat=True)), ['Dealer'])
+        self.assertFalse(user.has_usable_password())
+
+        with self.assertNumQueries(1):
+            self.backend.get_or_create_user('D001', 'Dealer')
+
+    def test_role_change_replaces_group(self):
+        user = self.backend.get_or_create_user('D001', 'Dealer')
+        self.backend.get_or_create_user('D001', 'Admin')
+        self.assertEqual(list(user.groups.values_list('name', flat=True)), ['Admin'])
+
+    def test_unlink_mirrored_users_command(self):
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd='dealer123')
+        CustomUser.objects.create_user(username='D001', password='dealer123')
+        CustomUser.objects.create_user(username='outro', password='senha123')
+
+        call_command('unlink_mirrored_users', stdout=StringIO())
+
+        self.assertFalse(CustomUser.objects.get(username='D001').has_usable_password())
+        self.assertTrue(CustomUser.objects.get(username='outro').has_usable_password())
+
+
+class BcryptRehashTestCase(TestCase):
+    def setUp(self):
+        clear_group_cache()
+
+    def test_login_rehashes_outdated_cost(self):
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd=hash_password('dealer123', rounds=4))
+
+        with self.settings(BCRYPT_ROUNDS=5):
+            user = CustomAuthBackend().authenticate(None, username='D001', password='dealer123')
+
+        self.assertIsNotNone(user)
+        self.assertEqual(get_bcrypt_cost(Dealer.objects.get(dealer_id='D001').dlpasswd), 5)
+
+    def test_migrate_passwords_in_batches(self):
+        Dealer.objects.bulk_create([
+            Dealer(dealer_id=f'D{i:03d}', dealer_name=f'Dealer {i}', dlpasswd=f'senha-D{i:03d}')
+            for i in range(5)
+        ])
+
+        with self.settings(BCRYPT_ROUNDS=4):
+            call_command('migrate_passwords', batch_size=2, workers=2, stdout=StringIO())
+
+        for dealer in Dealer.objects.all():
+            self.assertTrue(check_password(f'senha-{dealer.dealer_id}', dealer.dlpasswd))
+
+
+@override_settings(LOGIN_RATE_LIMIT={'USER_RATE': (100, 60), 'IP_RATE': (100, 60)})
+class LoginLockoutTestCase(TestCase):
+    def setUp(self):
+        clear_group_cache()
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd=hash_password('dealer123', rounds=4))
+
+    def test_locks_after_max_attempts(self):
+        for _ in range(5):
+            self.client.post('/login/', {'username': 'D001', 'password': 'errada'})
+
+        response = self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+        self.assertTrue(response.context['account_locked'])
+        self.assertEqual(LoginAttemptCounter.objects.get(key='login_attempts:D001:127.0.0.1').count, 5)
+
+    def test_padded_username_counts_against_the_same_lockout(self):
+        for _ in range(5):
+            self.client.post('/login/', {'username': ' D001 ', 'password': 'errada'})
+
+        response = self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+        self.assertTrue(response.context['account_locked'])
+        self.assertEqual(LoginAttemptCounter.objects.get(key='login_attempts:D001:127.0.0.1').count, 5)
+
+    def test_success_resets_counters(self):
+        self.client.post('/login/', {'username': 'D001', 'password': 'errada'})
+        response = self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+
+        self.assertRedirects(response, '/dealer/dashboard/', fetch_redirect_response=False)
+        self.assertFalse(LoginAttemptCounter.objects.exists())
+
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncLoginTestCase(TestCase):
+    async_client_class = AsyncClient
+
+    def setUp(self):
+        clear_group_cache()
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd=hash_password('dealer123', rounds=4))
+
+    async def test_login_redirects_and_remembers_roles(self):
+        response = await self.async_client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '/dealer/dashboard/')
+        session = await self.async_client.asession()
+        self.assertEqual((await session.aget(ROLE_SESSION_KEY))['roles'], ['Dealer'])
+
+    async def test_unknown_user_hashes_in_the_pool(self):
+        threads = []
+
+        def recording_hash(password, rounds=None):
+            threads.append(threading.current_thread().name)
+            return hash_password(password, rounds=4)
+
+        with patch('authentication.backends.hash_password', recording_hash), \
+                patch('django.contrib.auth.backends.ModelBackend.aauthenticate') as model_backend:
+            response = await self.async_client.post('/login/', {'username': 'ninguem', 'password': 'x'})
+        self.assertEqual(response.status_code, 200)
+        model_backend.assert_not_called()
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('bcrypt'))
+
+    async def test_wrong_password_is_refused(self):
+        response = await self.async_client.post('/login/', {'username': 'D001', 'password': 'errada'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await (await self.async_client.asession()).ahas_key('_auth_user_id'))
+        counter = await LoginAttemptCounter.objects.aget(key='login_attempts:D001:127.0.0.1')
+        self.assertEqual(counter.count, 1)
+
+    async def test_saturated_pool_returns_503(self):
+        for username in ('D001', 'ninguem'):
+            with self.subTest(username=username), \
+                    patch.object(get_hash_pool(), 'submit', side_effect=HashPoolSaturated):
+                response = await self.async_client.post('/login/', {'username': username, 'password': 'dealer123'})
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '5')
+        self.assertFalse(await LoginAttemptCounter.objects.aexists())
+
+
+class RateLimiterTestCase(TestCase):
+    def assert_burst_then_limited(self, store):
+        limiter = RateLimiter(store)
+        for _ in range(3):
+            self.assertTrue(limiter.hit('ip:10.0.0.1', 3, 60)[0])
+        allowed, retry_after = limiter.hit('ip:10.0.0.1', 3, 60)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(limiter.hit('ip:10.0.0.2', 3, 60)[0])
+
+    def test_local_memory_store(self):
+        self.assert_burst_then_limited(LocalMemoryStore())
+
+    def test_shared_memory_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assert_burst_then_limited(SharedMemoryStore(path=os.path.join(tmp, 'rl.shm'), slots=64))
+
+    @override_settings(LOGIN_RATE_LIMIT={'USER_RATE': (2, 60), 'IP_RATE': (100, 60)})
+    def test_login_burst_is_rejected_before_lockout_and_bcrypt(self):
+        for _ in range(2):
+            self.client.post('/login/', {'username': 'D001', 'password': 'errada'})
+
+        # Só a leitura da sessão - nenhum contador, principal ou hash
+        with self.assertNumQueries(1):
+            response = self.client.post('/login/', {'username': 'D001', 'password': 'errada'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class CacheSweeperTestCase(TestCase):
+    def test_set_skips_cull_and_purge_removes_expired(self):
+        cache = SweptDatabaseCache('login_security_cache', {'OPTIONS': {'INLINE_CULL': False, 'MAX_ENTRIES': 1}})
+        cache.set('login_attempts:D001:10.0.0.1', 1, -1)
+        cache.set('login_attempts:D002:10.0.0.1', 1, -1)
+        # Acima de MAX_ENTRIES o DatabaseCache apagaria as expiradas dentro do set()
+        with CaptureQueriesContext(connection) as queries:
+            cache.set('ip_attempts:10.0.0.1', 1, 60)
+        self.assertFalse(any(query['sql'].startswith('DELETE') for query in queries.captured_queries))
+        cache.delete('login_attempts:D002:10.0.0.1')
+
+        LoginAttemptCounter.objects.create(key='ip_attempts:10.0.0.1', count=3, expires_at=timezone.now())
+
+        self.assertEqual(cache.purge_expired(batch_size=1), 1)
+        self.assertEqual(cache.get('ip_attempts:10.0.0.1'), 1)
+        self.assertEqual(purge_expired_counters(), 1)
+
+    def test_sweeper_thread_starts_per_serving_process(self):
+        with patch('authentication.dbcache.threading.Thread') as thread, \
+                patch.dict('authentication.dbcache._sweeper_thread', {'thread': None, 'pid': None}):
+            self.client.get('/public/vehicles/')
+            thread.assert_not_called()
+
+            with override_settings(LOGIN_CACHE_SWEEPER={'ENABLED': True}):
+                self.client.get('/public/vehicles/')
+                self.client.get('/public/vehicles/')
+                self.assertEqual(thread.call_count, 1)
+
+                # Processo filho de um fork: a thread não existe nele
+                with patch('authentication.dbcache.os.getpid', return_value=-1):
+                    self.client.get('/public/vehicles/')
+                self.assertEqual(thread.call_count, 2)
+
+
+class RoleCacheTestCase(TestCase):
+    def setUp(self):
+        clear_group_cache()
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd=hash_password('dealer123', rounds=4))
+        self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+
+    def test_dealer_pages_do_not_query_groups(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dealer/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user_groups'], ['Dealer'])
+        self.assertFalse(any('auth_user_groups' in query['sql'] for query in queries.captured_queries))
+
+    def test_admin_page_denied_from_cached_roles(self):
+        response = self.client.get('/admincar/dashboard/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_group_change_invalidates_session_roles(self):
+        self.assertEqual(self.client.get('/dealer/dashboard/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.get(username='D001').groups.clear()
+        self.assertEqual(self.client.get('/dealer/dashboard/').status_code, 403)
+
+    def test_session_roles_checked_without_cache_query(self):
+        self.client.get('/dealer/dashboard/')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/dealer/dashboard/').status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if 'login_security_cache' in query['sql']])
+
+
+@override_settings(AUTH_INSTRUMENTATION={'SAMPLE_RATE': 1.0},
+                   LOGIN_RATE_LIMIT={'USER_RATE': (100, 60), 'IP_RATE': (100, 60)})
+class AuthInstrumentationTestCase(TestCase):
+    def setUp(self):
+        clear_group_cache()
+        auth_metrics.reset()
+        Dealer.objects.create(dealer_id='D001', dealer_name='João Silva', dlpasswd=hash_password('dealer123', rounds=4))
+
+    def test_login_emits_sampled_event_and_counters(self):
+        with self.assertLogs('authentication.auth', level='INFO') as logs:
+            self.client.post('/login/', {'username': 'D001', 'password': 'dealer123'})
+
+        event = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(event['outcome'], 'success')
+        for stage in ('rate_limit', 'lockout_check', 'lookup', 'bcrypt', 'group_sync', 'lockout_reset'):
+            self.assertIn(stage, event['stages_ms'])
+
+        metrics = auth_metrics.snapshot()
+        self.assertEqual(metrics['outcomes'], {'success': 1})
+        self.assertEqual(metrics['stages']['bcrypt']['count'], 1)
+
+
+class CatalogSnapshotTestCase(TestCase):
+    def setUp(self):
+        Vehicle.objects.create(name='Corolla', brand='TOYOTA', body_type='SEDAN', quantity_available=2)
+        Vehicle.objects.create(name='Dolphin', brand='BYD', body_type='HATCHBACK', quantity_available=1)
+
+    def test_listing_reads_one_page_and_cached_totals(self):
+        self.client.get('/public/vehicles/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/public/vehicles/', {'page_size': 1})
+        self.assertEqual(response.context['total_available'], 3)
+        self.assertEqual(list(response.context['vehicles_by_brand']), ['BYD'])
+        # Só a página (LIMIT page_size + 1) - nem o catálogo inteiro nem os totais
+        vehicle_queries = [query['sql'] for query in queries.captured_queries if 'vehicles' in query['sql']]
+        self.assertEqual(len(vehicle_queries), 1)
+        self.assertIn('LIMIT 2', vehicle_queries[0])
+
+    def test_vehicle_save_bumps_version(self):
+        self.client.get('/public/vehicles/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.create(name='Hilux', brand='TOYOTA', body_type='SUV', quantity_available=4)
+
+        response = self.client.get('/public/vehicles/')
+        self.assertEqual(response.context['total_vehicles'], 3)
+
+    def test_listing_is_paginated_by_cursor(self):
+        response = self.client.get('/public/vehicles/', {'page_size': 1})
+        self.assertEqual(list(response.context['vehicles_by_brand']), ['BYD'])
+        self.assertEqual(response.context['total_vehicles'], 2)
+
+        response = self.client.get('/public/vehicles/', {'page_size': 1, 'cursor': response.context['next_cursor']})
+        self.assertEqual(list(response.context['vehicles_by_brand']), ['TOYOTA'])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_cursor_walks_mixed_case_names_in_database_order(self):
+        Vehicle.objects.create(name='seal', brand='BYD', body_type='SEDAN', quantity_available=1)
+        Vehicle.objects.create(name='Song', brand='BYD', body_type='SUV', quantity_available=1)
+        expected = list(Vehicle.objects.order_by('brand', 'name', 'id').values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 1, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/public/vehicles/', params)
+            seen += [vehicle.pk for vehicles in response.context['vehicles_by_brand'].values() for vehicle in vehicles]
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        # Nem pula nem repete: a ordem é a do banco (collation), não a do Python
+        self.assertEqual(seen, expected)
+
+    def test_brand_sections_served_from_fragment_cache(self):
+        caches['fragments'].clear()
+        self.client.get('/public/vehicles/')
+        with patch.object(Vehicle, 'get_body_type_display') as display:
+            response = self.client.get('/public/vehicles/')
+        display.assert_not_called()
+        self.assertContains(response, 'Hatchback')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.filter(name='Dolphin').update(quantity_available=7)
+            bump_catalog_version()
+        self.assertContains(self.client.get('/public/vehicles/'), '7 unidades')
+
+
+class VehicleSearchTestCase(TestCase):
+    def setUp(self):
+        Vehicle.objects.create(name='Corolla Cross', brand='TOYOTA', body_type='SUV', quantity_available=2)
+        Vehicle.objects.create(name='Corolla', brand='TOYOTA', body_type='SEDAN', quantity_available=1)
+        Vehicle.objects.create(name='Dolphin', brand='BYD', body_type='HATCHBACK', quantity_available=1)
+
+    def test_ranked_and_combined_with_filters(self):
+        self.assertEqual([v.name for v in search_catalog('corola')], ['Corolla', 'Corolla Cross'])
+        self.assertEqual([v.name for v in search_catalog('corolla', body_type='SUV')], ['Corolla Cross'])
+        self.assertEqual(search_catalog('dolphin', brand='TOYOTA'), [])
+
+    def test_index_follows_vehicle_signals(self):
+        self.assertEqual(search_catalog('seal'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.create(name='Seal', brand='BYD', body_type='SEDAN', quantity_available=3)
+        self.assertEqual([v.name for v in search_catalog('seal')], ['Seal'])
+
+    def test_facets_ignore_own_filter(self):
+        vehicles, facets = search_catalog('corolla', body_type='SUV', with_facets=True)
+        self.assertEqual([v.name for v in vehicles], ['Corolla Cross'])
+        brands = {facet['value']: facet['count'] for facet in facets['brands']}
+        body_types = {facet['value']: facet['available'] for facet in facets['body_types']}
+        self.assertEqual(brands, {'TOYOTA': 1, 'BYD': 0})
+        self.assertEqual(body_types, {'SUV': 2, 'SEDAN': 1, 'HATCHBACK': 0})
+
+
+@override_settings(VEHICLE_SUGGEST={'REFRESH_INTERVAL': 0})
+class VehicleSuggestTestCase(TestCase):
+    def setUp(self):
+        Vehicle.objects.create(name='Corolla Cross', brand='TOYOTA', body_type='SUV', quantity_available=2)
+        Vehicle.objects.create(name='Camry', brand='TOYOTA', body_type='SEDAN', quantity_available=1)
+
+    def test_prefix_matches_any_word(self):
+        response = self.client.get('/api/vehicles/suggest/', {'q': 'cr'})
+        self.assertEqual(response.json()['suggestions'], ['Corolla Cross'])
+        response = self.client.get('/api/vehicles/suggest/', {'q': 'C'})
+        self.assertEqual(response.json()['suggestions'], ['Camry', 'Corolla Cross'])
+
+    def test_index_updated_incrementally(self):
+        self.client.get('/api/vehicles/suggest/', {'q': 'cr'})
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = Vehicle.objects.create(name='Crown', brand='TOYOTA', body_type='SEDAN', quantity_available=1)
+        self.assertEqual(suggest_vehicle_names('cr'), ['Corolla Cross', 'Crown'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.delete()
+        with self.assertNumQueries(1):  # Só a leitura da versão do catálogo
+            self.assertEqual(suggest_vehicle_names('cr'), ['Corolla Cross'])
+
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(name='Corolla', brand='TOYOTA', body_type='SEDAN', quantity_available=2)
+
+    def test_public_page_revalidates_with_etag(self):
+        response = self.client.get('/public/vehicles/')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertNotIn('no-store', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/public/vehicles/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_api_etag_changes_with_catalog(self):
+        etag = self.client.get('/api/vehicles/public/')['ETag']
+        self.assertEqual(self.client.get('/api/vehicles/public/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.quantity_available = 1
+            self.vehicle.save()
+        response = self.client.get('/api/vehicles/public/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['vehicles'][0]['quantity_available'], 1)
+
+
+def make_image_file(name='carro.png', size=(1200, 600), mode='RGBA'):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageRenditionTestCase(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_save_generates_renditions_and_srcset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = Vehicle.objects.create(
+                name='Seal', brand='BYD', body_type='SEDAN', quantity_available=1, image=make_image_file(),
+            )
+            # Nada de Pillow dentro da transação do save
+            self.assertEqual(Vehicle.objects.get(pk=vehicle.pk).image_renditions, {})
+        items = Vehicle.objects.get(pk=vehicle.pk).image_renditions['items']
+        self.assertEqual({(item['format'], item['width'], item['height']) for item in items}, {
+            (fmt, width, width // 2) for fmt in ('webp', 'jpeg') for width in (320, 640, 960)
+        })
+        for item in items:
+            self.assertTrue(os.path.exists(os.path.join(self.media.name, item['path'])))
+
+        data = self.client.get('/api/vehicles/public/').json()['vehicles'][0]
+        self.assertIn('-320w.webp 320w', data['image_srcset']['webp'])
+        self.assertContains(self.client.get('/public/vehicles/'), 'type="image/webp"')
+
+        # Imagem inalterada: nada é agendado
+        with patch('authentication.signals.update_vehicle_renditions') as update, \
+                self.captureOnCommitCallbacks(execute=True):
+            vehicle.quantity_available = 2
+            vehicle.save()
+        update.assert_not_called()
+
+    def test_backfill_generates_missing_and_skips_up_to_date(self):
+        # Veículo cadastrado antes das rendições existirem
+        with patch('authentication.signals.update_vehicle_renditions'):
+            vehicle = Vehicle.objects.create(
+                name='Seal', brand='BYD', body_type='SEDAN', quantity_available=1, image=make_image_file(),
+            )
+        # Imagem sem veículo (upload antigo) também ganha rendições
+        Image.new('RGB', (400, 300)).save(os.path.join(self.media.name, 'vehicles', 'antiga.jpg'))
+
+        out = StringIO()
+        call_command('backfill_renditions', workers=1, stdout=out)
+        self.assertIn('Geradas: 2, em dia: 0, erros: 0, veículos atualizados: 1', out.getvalue())
+        renditions = Vehicle.objects.get(pk=vehicle.pk).image_renditions
+        self.assertEqual(len(renditions['items']), 6)
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, 'vehicles/renditions/antiga-400w.webp')))
+
+        out = StringIO()
+        call_command('backfill_renditions', workers=2, stdout=out)
+        self.assertIn('Geradas: 0, em dia: 2, erros: 0, veículos atualizados: 0', out.getvalue())
+        self.assertIn('imagens/s', out.getvalue())
+
+
+class ContentAddressedStorageTestCase(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_vehicle(self, image):
+        return Vehicle.objects.create(name='Seal', brand='BYD', body_type='SEDAN', quantity_available=1, image=image)
+
+    def test_identical_uploads_share_one_immutable_file(self):
+        first = self.create_vehicle(make_image_file('seal.png'))
+        second = self.create_vehicle(make_image_file('outro_nome.PNG'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^vehicles/[0-9a-f]{64}\.png$')
+        self.assertEqual(
+            [f for f in os.listdir(os.path.join(self.media.name, 'vehicles')) if f.endswith('.png')],
+            [os.path.basename(first.image.name)],
+        )
+
+        # Fora de DEBUG quem serve a mídia é o servidor web, não o Django
+        self.assertEqual(self.client.get(first.image.url).status_code, 404)
+        response = serve_immutable_media(RequestFactory().get(first.image.url), first.image.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_concurrent_identical_upload_reuses_existing_file(self):
+        storage = vehicle_image_storage()
+        first = storage.save('vehicles/seal.png', make_image_file('seal.png'))
+        # O outro upload ainda não via o arquivo quando consultou exists()
+        with patch.object(storage, 'exists', return_value=False):
+            second = storage.save('vehicles/seal.png', make_image_file('seal.png'))
+        self.assertEqual(first, second)
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'vehicles')), [os.path.basename(first)])
+
+    def test_dedupe_command_merges_copies_and_rewrites_fields(self):
+        directory = os.path.join(self.media.name, 'vehicles')
+        os.makedirs(directory)
+        content = make_image_file().read()
+        for filename in ('suv.jpg', 'suv_afsGbh6.jpg', 'suv_dS8WPzf.JPG'):
+            with open(os.path.join(directory, filename), 'wb') as f:
+                f.write(content)
+        with patch('authentication.signals.update_vehicle_renditions'):
+            vehicles = [self.create_vehicle(name) for name in ('vehicles/suv.jpg', 'vehicles/suv_afsGbh6.jpg')]
+
+        out = StringIO()
+        call_command('dedupe_vehicle_images', stdout=out)
+        self.assertIn('Veículos atualizados: 2', out.getvalue())
+        names = {Vehicle.objects.get(pk=vehicle.pk).image.name for vehicle in vehicles}
+        self.assertEqual(len(names), 1)
+        self.assertEqual(os.listdir(directory), [os.path.basename(names.pop())])
+
+
+class PurchaseStockTestCase(TransactionTestCase):
+    def setUp(self):
+        self.dealer = Dealer.objects.create(dealer_id='DL900', dealer_name='Loja', dlpasswd='x', is_public=True)
+        self.vehicle = Vehicle.objects.create(name='Seal', brand='BYD', body_type='SEDAN', quantity_available=5)
+
+    def buy(self):
+        return place_purchase(Purchase(
+            vehicle_id=self.vehicle.pk, dealer=self.dealer, customer_name='Cliente', gender='N',
+            email='cliente@teste.com', phone='11999999999', monthly_salary='5000.00',
+        ))
+
+    def test_purchase_past_stock_is_refused(self):
+        # Roda em qualquer banco (uma conexão): a última unidade e a compra seguinte
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(quantity_available=1)
+        self.buy()
+        with self.assertRaises(OutOfStock):
+            self.buy()
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).quantity_available, 0)
+        self.assertEqual(Purchase.objects.filter(vehicle=self.vehicle).count(), 1)
+
+    def test_reserve_unit_is_a_conditional_update(self):
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(quantity_available=1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(reserve_unit(self.vehicle.pk))
+        # A condição de estoque vai no próprio UPDATE - sem SELECT antes
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn(f'{connection.ops.quote_name("quantity_available")} > 0', queries.captured_queries[0]['sql'])
+        self.assertFalse(reserve_unit(self.vehicle.pk))
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).quantity_available, 0)
+
+    # A disputa real entre compradores (MySQL, ou SQLite em arquivo): threads precisam
+    # de conexões próprias ao mesmo banco, o que o SQLite em memória não permite
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_concurrent_buyers_never_oversell(self):
+        results = []
+        barrier = threading.Barrier(16)
+
+        def buyer():
+            barrier.wait()
+            try:
+                for _ in range(3):
+                    try:
+                        self.buy()
+                        results.append('ok')
+                    except OutOfStock:
+                        results.append('sold_out')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('ok'), 5)
+        self.assertEqual(results.count('sold_out'), 16 * 3 - 5)
+        self.assertEqual(Purchase.objects.filter(vehicle=self.vehicle).count(), 5)
+        self.assertEqual(Vehicle.objects.get(pk=self.vehicle.pk).quantity_available, 0)
+
+
+class PurchaseCodeTestCase(TestCase):
+    def test_codes_are_unique_checked_and_reversible(self):
+        dealer = Dealer.objects.create(dealer_id='DL901', dealer_name='Loja', dlpasswd='x', is_public=True)
+        vehicle = Vehicle.objects.create(name='Seal', brand='BYD', body_type='SEDAN', quantity_available=3)
+        codes = [
+            place_purchase(Purchase(
+                vehicle=vehicle, dealer=dealer, customer_name='Cliente', gender='N',
+                email='cliente@teste.com', phone='11999999999', monthly_salary='5000.00',
+            )).purchase_code
+            for _ in range(3)
+        ]
+        self.assertEqual(len(set(codes)), 3)
+        numbers = [decode_purchase_code(code) for code in codes]
+        self.assertEqual(numbers, sorted(numbers))
+        for code in codes:
+            self.assertRegex(code, r'^[0-9A-Z]{10}$')
+            # Um caractere trocado invalida o código
+            typo = code[:4] + ('0' if code[4] != '0' else '1') + code[5:]
+            self.assertIsNone(decode_purchase_code(typo))
+
+    def test_codes_depend_on_the_secret_key(self):
+        keys = round_keys('a' * 32)
+        other_keys = round_keys('b' * 32)
+        codes = [encode_purchase_code(number, keys) for number in range(1000, 1010)]
+        # Com outra chave, nenhum código dos números consecutivos se repete: sem a
+        # chave não dá para calcular o código da próxima compra a partir dos anteriores
+        self.assertFalse(set(codes) & {encode_purchase_code(number, other_keys) for number in range(1000, 1010)})
+        self.assertEqual([decode_purchase_code(code, keys) for code in codes], list(range(1000, 1010)))
+        self.assertNotEqual([decode_purchase_code(code, other_keys) for code in codes], list(range(1000, 1010)))
+
+    def test_public_or_missing_key_is_refused(self):
+        for key in (None, '', 'purchase-codes', 'curta', settings.SECRET_KEY, 'django-insecure-' + 'x' * 32):
+            with self.subTest(key=key), override_settings(PURCHASE_CODES={'KEY': key}):
+                with self.assertRaises(ImproperlyConfigured):
+                    get_key()
+
+    def test_block_allocation_outside_transactions(self):
+        with patch.object(connection, 'in_atomic_block', False), \
+                patch('authentication.purchase_codes.allocate_numbers', side_effect=[(500, 502), (900, 1000)]) as allocate, \
+                patch.dict('authentication.purchase_codes._block', {'next': 0, 'end': 0}):
+            codes = [next_purchase_code() for _ in range(3)]
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual([decode_purchase_code(code) for code in codes], [500, 501, 900])
@@ -1,9 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 urlpatterns = [
     path('', views.home_view, name='home'),
-    path('login/', views.login_view, name='login'),
+    path('login/', views.login_view_async if settings.ASYNC_LOGIN else views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('admincar/dashboard/', views.admin_dashboard, name='admin_dashboard'),
@@ -21,8 +22,12 @@ urlpatterns = [
      #APIs
     path('api/dealers/public/', views.api_public_dealers, name='api-public-dealers'),
     path('api/vehicles/public/', views.api_public_vehicles, name='api-public-vehicles'),
+    path('api/vehicles/facets/', views.api_vehicle_facets, name='api-vehicle-facets'),
+    path('api/vehicles/suggest/', views.api_vehicle_suggest, name='api-vehicle-suggest'),
     path('api/purchase/', views.api_purchase_vehicle, name='api-purchase'),
     path('api/purchase/<str:purchase_code>/', views.api_purchase_detail, name='api-purchase-detail'),
     path('api/dealer/stats/', views.api_dealer_stats, name='api-dealer-stats'),
+    path('api/auth/hash-pool/', views.api_hash_pool_stats, name='api-hash-pool-stats'),
+    path('api/auth/metrics/', views.api_auth_metrics, name='api-auth-metrics'),
     path('api/cep/<str:cep>/', views.api_search_cep, name='api-search-cep'),
 ]
\ No newline at end of file
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# =============================================================================
+# CACHE DO USUÁRIO AUTENTICADO (CustomAuthBackend.get_user)
+# =============================================================================
+#
+# O snapshot guarda os campos concretos de CustomUser, exceto o hash da senha:
+# no lugar dele vai o hash de sessão (get_session_auth_hash), e a senha fica
+# como campo adiado, lida do banco só se alguém a usar. Fica em um LRU local
+# com TTL curto e, se o cache do Django não for o de banco, no cache
+# compartilhado. save/delete e logout removem as duas camadas; nos demais
+# workers o LRU local expira em LOCAL_TTL segundos.
+
+DEFAULT_USER_CACHE_CONFIG = {
+    'LOCAL_TTL': 5,  # Segundos que um snapshot vale no LRU local (atraso máximo entre workers)
+    'TTL': 60,  # Segundos que um snapshot vale no cache compartilhado
+    'MAX_ENTRIES': 1024,  # Usuários mantidos no LRU local
+    'SHARED': True,  # Usa o cache do Django entre workers - ignorado com DatabaseCache
+}
+
+class LocalUserCache:
+    """
+    LRU com TTL no processo
+    """
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return snapshot
+
+    def set(self, user_id, snapshot):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+_local_cache = None
+
+def _get_config():
+    return {**DEFAULT_USER_CACHE_CONFIG, **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+def _get_local_cache():
+    global _local_cache
+    if _local_cache is None:
+        config = _get_config()
+        _local_cache = LocalUserCache(config['MAX_ENTRIES'], config['LOCAL_TTL'])
+    return _local_cache
+
+def _shared_enabled(config):
+    """Cache compartilhado só quando ele é mais barato que o SELECT por chave primária"""
+    return config['SHARED'] and not isinstance(caches['default'], DatabaseCache)
+
+def _shared_key(user_id):
+    return f'auth_user_snapshot:{user_id}'
+
+def make_snapshot(user):
+    """
+    Snapshot serializável do usuário: campos concretos sem a senha + hash de sessão
+    """
+    return {
+        'fields': {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        },
+        'session_auth_hash': user.get_session_auth_hash(),
+    }
+
+def build_user(snapshot):
+    """Reconstrói o CustomUser a partir do snapshot, sem acessar o banco (senha adiada)"""
+    from .models import CustomUser
+
+    fields = snapshot['fields']
+    user = CustomUser.from_db('default', list(fields), list(fields.values()))
+    user._session_auth_hash = snapshot['session_auth_hash']
+    return user
+
+def load_user(user_id, loader):
+    """
+    Retorna o usuário do LRU local, do cache compartilhado ou de loader(user_id)
+    (que retorna None se o usuário não existir)
+    """
+    config = _get_config()
+    shared = _shared_enabled(config)
+    local_cache = _get_local_cache()
+
+    snapshot = local_cache.get(user_id)
+    if snapshot is None and shared:
+        snapshot = cache.get(_shared_key(user_id))
+        if snapshot is not None:
+            local_cache.set(user_id, snapshot)
+
+    if snapshot is None:
+        user = loader(user_id)
+        if user is None:
+            return None
+        snapshot = make_snapshot(user)
+        local_cache.set(user_id, snapshot)
+        if shared:
+            cache.set(_shared_key(user_id), snapshot, config['TTL'])
+        return user
+
+    return build_user(snapshot)
+
+def invalidate_user(user_id):
+    """Remove o snapshot do usuário do LRU local e do cache compartilhado"""
+    _get_local_cache().delete(user_id)
+    if _shared_enabled(_get_config()):
+        cache.delete(_shared_key(user_id))
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    """Recria o LRU quando AUTH_USER_CACHE muda (override_settings nos testes)"""
+    global _local_cache
+    if setting == 'AUTH_USER_CACHE':
+        _local_cache = None
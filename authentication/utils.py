@@ -1,25 +1,45 @@
 import bcrypt
+import logging
 from django.conf import settings
+import os
 import re
-from django.core.cache import cache
 import time
+from .instrumentation import timed
+
+logger = logging.getLogger('authentication.auth')
 
 # =============================================================================
 # SEÇÃO 1: FUNÇÕES DE HASH DE SENHA
 # =============================================================================
 
-def hash_password(password):
+def get_bcrypt_rounds():
+    """Custo bcrypt configurado para a implantação (settings.BCRYPT_ROUNDS)"""
+    return getattr(settings, 'BCRYPT_ROUNDS', 12)
+
+def get_bcrypt_cost(hashed):
+    """Extrai o custo de um hash bcrypt ($2b$12$... -> 12)"""
+    return int(hashed[4:6])
+
+def password_needs_rehash(hashed):
+    """Indica se o hash foi gerado com um custo diferente do configurado"""
+    return is_valid_bcrypt_hash(hashed) and get_bcrypt_cost(hashed) != get_bcrypt_rounds()
+
+def hash_password(password, rounds=None):
     """Gera hash bcrypt para a senha"""
     if not password:
         raise ValueError("Password cannot be empty")
     
     # Gerar salt e hash
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=rounds or get_bcrypt_rounds())
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
-def check_password(password, hashed):
-    """Verifica se a senha corresponde ao hash"""
+def check_password(password, hashed, setter=None):
+    """
+    Verifica se a senha corresponde ao hash.
+    Se for válida e o custo do hash estiver desatualizado, chama setter(password)
+    para regravar o hash com o custo configurado.
+    """
     if not password or not hashed:
         return False
     
@@ -27,14 +47,16 @@ def check_password(password, hashed):
         return False
 
     try:
-        password_bytes = password.encode('utf-8')
-        hashed_bytes = hashed.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
-    except Exception as e:
-        print(f"[bcrypt.checkpw] Erro ao verificar senha: {e}")
-        print(f"password (type={type(password)}): {password}")
-        print(f"hashed (type={type(hashed)}): {hashed}")
+        with timed('bcrypt'):
+            is_correct = bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except (TypeError, ValueError) as e:
+        # Nunca registrar a senha nem o hash
+        logger.warning('bcrypt.checkpw falhou: %s', e)
         return False
+    
+    if is_correct and setter and password_needs_rehash(hashed):
+        setter(password)
+    return is_correct
 
 def is_valid_bcrypt_hash(hashed):
     """Verifica se a string tem formato de hash bcrypt válido"""
@@ -52,25 +74,61 @@ def migrate_single_password(plain_password):
     
     return hash_password(plain_password)
 
-def migrate_passwords():
-    """Função para migrar senhas em texto plano para hash"""
+def _hash_plain_password(args):
+    """Worker do ProcessPoolExecutor - função de módulo para poder ser serializada"""
+    password, rounds = args
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _migrate_batch(executor, model, field, batch, rounds, workers):
+    """Gera os hashes do lote em paralelo e grava tudo com um bulk_update"""
+    plain_passwords = [(getattr(obj, field), rounds) for obj in batch]
+    chunksize = max(1, len(batch) // (workers * 4))
+    for obj, hashed in zip(batch, executor.map(_hash_plain_password, plain_passwords, chunksize=chunksize)):
+        setattr(obj, field, hashed)
+    # bulk_update não passa pelo save() - os hashes já são válidos
+    model.objects.bulk_update(batch, [field])
+    return len(batch)
+
+def migrate_passwords(batch_size=500, workers=None, progress=None):
+    """
+    Função para migrar senhas em texto plano para hash.
+    Lê as linhas com iterator(), gera os hashes em um ProcessPoolExecutor
+    (um processo por núcleo) e grava com bulk_update a cada batch_size linhas.
+    progress(migrated_count, elapsed_seconds) é chamado após cada lote.
+    """
+    from concurrent.futures import ProcessPoolExecutor
     from .models import Admin, Dealer
     
+    workers = workers or os.cpu_count() or 1
+    rounds = get_bcrypt_rounds()
     migrated_count = 0
+    start = time.perf_counter()
+    executor = None
     
-    for admin in Admin.objects.all():
-        if not is_valid_bcrypt_hash(admin.passwd):
-            print(f"Migrando senha do admin: {admin.admin_name}")
-            admin.passwd = migrate_single_password(admin.passwd)
-            admin.save()
-            migrated_count += 1
-    
-    for dealer in Dealer.objects.all():
-        if not is_valid_bcrypt_hash(dealer.dlpasswd):
-            print(f"Migrando senha do dealer: {dealer.dealer_id}")
-            dealer.dlpasswd = migrate_single_password(dealer.dlpasswd)
-            dealer.save()
-            migrated_count += 1
+    try:
+        for model, field in ((Admin, 'passwd'), (Dealer, 'dlpasswd')):
+            rows = model.objects.only(model._meta.pk.name, field)
+            batch = []
+            for obj in rows.iterator(chunk_size=batch_size):
+                if not getattr(obj, field) or is_valid_bcrypt_hash(getattr(obj, field)):
+                    continue
+                batch.append(obj)
+                if len(batch) < batch_size:
+                    continue
+                executor = executor or ProcessPoolExecutor(max_workers=workers)
+                migrated_count += _migrate_batch(executor, model, field, batch, rounds, workers)
+                batch = []
+                if progress:
+                    progress(migrated_count, time.perf_counter() - start)
+            
+            if batch:
+                executor = executor or ProcessPoolExecutor(max_workers=workers)
+                migrated_count += _migrate_batch(executor, model, field, batch, rounds, workers)
+                if progress:
+                    progress(migrated_count, time.perf_counter() - start)
+    finally:
+        if executor:
+            executor.shutdown()
     
     return migrated_count
 
@@ -95,167 +153,45 @@ def get_login_attempts_key(username, ip_address):
     """
     return f'login_attempts:{username}:{ip_address}'
 
-def get_ip_block_key(ip_address):
-    """
-    Gera chave para bloqueio por IP
-    """
-    return f'ip_block:{ip_address}'
-
 def increment_login_attempts(request, username):
     """
-    Incrementa contador de tentativas falhas
+    Incrementa contador de tentativas falhas (ver lockout.LockoutEngine)
     """
-    # Configurações padrão caso não estejam definidas
-    config = getattr(settings, 'LOGIN_SECURITY_CONFIG', {
-        'MAX_LOGIN_ATTEMPTS': 8,
-        'LOCKOUT_TIME': 900,
-        'IP_LOCKOUT_ATTEMPTS': 15,
-        'IP_LOCKOUT_TIME': 1800,
-    })
-    
-    ip_address = get_client_ip_address(request)
-    
-    # Tentativas na sessão atual
-    session_attempts = request.session.get('login_attempts', 0) + 1
-    request.session['login_attempts'] = session_attempts
-    
-    # Tentativas totais no cache
-    cache_key = get_login_attempts_key(username, ip_address)
-    attempts = cache.get(cache_key, 0) + 1
-    cache.set(cache_key, attempts, config['LOCKOUT_TIME'])
-    
-    # Tentativas por IP
-    ip_attempts = cache.get(f'ip_attempts:{ip_address}', 0) + 1
-    cache.set(f'ip_attempts:{ip_address}', ip_attempts, config['IP_LOCKOUT_TIME'])
-    
-    return {
-        'session_attempts': session_attempts,
-        'total_attempts': attempts,
-        'ip_attempts': ip_attempts,
-        'ip_address': ip_address,
-        'remaining_attempts': max(0, config['MAX_LOGIN_ATTEMPTS'] - attempts)
-    }
+    from .lockout import get_lockout_engine
+    return get_lockout_engine().register_failure(request, username)
 
 def reset_login_attempts(request, username):
     """
     Reseta contadores após login bem-sucedido
     """
-    ip_address = get_client_ip_address(request)
-    
-    # Limpa sessão
-    if 'login_attempts' in request.session:
-        del request.session['login_attempts']
-    if 'locked_until' in request.session:
-        del request.session['locked_until']
-    
-    # Limpa cache
-    cache_key = get_login_attempts_key(username, ip_address)
-    cache.delete(cache_key)
-    cache.delete(f'ip_attempts:{ip_address}')
-    cache.delete(get_ip_block_key(ip_address))
+    from .lockout import get_lockout_engine
+    get_lockout_engine().reset(request, username)
 
 def is_account_locked(request, username):
     """
     Verifica se a conta está bloqueada
     """
-    
-    # Configurações padrão
-    config = getattr(settings, 'LOGIN_SECURITY_CONFIG', {
-        'MAX_LOGIN_ATTEMPTS': 8,
-        'LOCKOUT_TIME': 900,
-        'IP_LOCKOUT_ATTEMPTS': 15,
-        'IP_LOCKOUT_TIME': 1800,
-    })
-    
-    ip_address = get_client_ip_address(request)
-    current_time = time.time()
-    
-    
-    # Verifica bloqueio por IP primeiro
-    ip_block_key = get_ip_block_key(ip_address)
-    ip_blocked_until = cache.get(ip_block_key)
-    
-    if ip_blocked_until and ip_blocked_until > current_time:
-        remaining_time = int((ip_blocked_until - current_time) / 60)
-        #print(f"🔍 [DEBUG] BLOQUEADO POR IP - Tempo restante: {remaining_time}min")
-        return {
-            'locked': True,
-            'reason': 'ip',
-            'until': ip_blocked_until,
-            'message': f'IP bloqueado por excesso de tentativas. Tente novamente em {remaining_time} minutos.'
-        }
-    
-    # Verifica bloqueio por usuário
-    cache_key = get_login_attempts_key(username, ip_address)
-    attempts = cache.get(cache_key, 0)
-    
-    # Verifica se excedeu tentativas por IP
-    ip_attempts = cache.get(f'ip_attempts:{ip_address}', 0)
-    
-    if ip_attempts >= config['IP_LOCKOUT_ATTEMPTS']:
-        lockout_time = config['IP_LOCKOUT_TIME']
-        blocked_until = current_time + lockout_time
-        cache.set(ip_block_key, blocked_until, lockout_time)
-        remaining_time = int(lockout_time / 60)
-        #print(f"🔍 [DEBUG] BLOQUEADO POR IP - Excedeu limite")
-        return {
-            'locked': True,
-            'reason': 'ip',
-            'until': blocked_until,
-            'message': f'IP bloqueado por excesso de tentativas. Tente novamente em {remaining_time} minutos.'
-        }
-    
-    # Verifica se excedeu tentativas por usuário
-    if attempts >= config['MAX_LOGIN_ATTEMPTS']:
-        lockout_time = config['LOCKOUT_TIME']
-        blocked_until = current_time + lockout_time
-        
-        
-        # Verifica se já está registrado como bloqueado
-        lock_key = cache_key + ':locked'
-        existing_lock = cache.get(lock_key)
-        if not existing_lock or existing_lock < current_time:
-            cache.set(lock_key, blocked_until, lockout_time)
-            #print(f"🔍 [DEBUG] Novo bloqueio setado até: {blocked_until}")
-        
-        remaining_time = int((blocked_until - current_time) / 60)
-        return {
-            'locked': True,
-            'reason': 'user',
-            'until': blocked_until,
-            'message': f'Conta bloqueada por excesso de tentativas. Tente novamente em {remaining_time} minutos.'
-        }
-    
-    return {'locked': False}
+    from .lockout import get_lockout_engine
+    return get_lockout_engine().check(request, username)
 
 def get_remaining_attempts(request, username):
     """
     Retorna tentativas restantes
     """
-    config = getattr(settings, 'LOGIN_SECURITY_CONFIG', {
-        'MAX_LOGIN_ATTEMPTS': 8,
-        'LOCKOUT_TIME': 900,
-    })
-    
-    ip_address = get_client_ip_address(request)
-    cache_key = get_login_attempts_key(username, ip_address)
-    attempts = cache.get(cache_key, 0)
-    
-    return max(0, config['MAX_LOGIN_ATTEMPTS'] - attempts)
+    from .lockout import get_lockout_engine
+    return get_lockout_engine().check(request, username)['remaining_attempts']
 
 def get_security_status(request, username):
     """
     Retorna status completo de segurança para debug ou exibição
     """
-    ip_address = get_client_ip_address(request)
     lock_status = is_account_locked(request, username)
-    remaining = get_remaining_attempts(request, username)
     
     return {
-        'ip_address': ip_address,
+        'ip_address': lock_status['ip_address'],
         'is_locked': lock_status['locked'],
         'lock_reason': lock_status.get('reason', 'none'),
         'lock_message': lock_status.get('message', ''),
-        'remaining_attempts': remaining,
+        'remaining_attempts': lock_status['remaining_attempts'],
         'session_attempts': request.session.get('login_attempts', 0)
     }
\ No newline at end of file
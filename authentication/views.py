@@ -1,5 +1,6 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import authenticate, login, logout, alogin
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
@@ -7,15 +8,31 @@ from django.views.decorators.csrf import csrf_protect
 from django.contrib import messages
 import time
 from .forms import CustomAuthenticationForm, PurchaseForm  
+from .backends import CustomAuthBackend
 from .decorators import admin_required, dealer_required
-from .utils import increment_login_attempts, reset_login_attempts, is_account_locked, get_remaining_attempts
+from .lockout import get_lockout_engine
+from .ratelimit import get_rate_limiter
+from .roles import get_request_roles, get_user_roles, has_role, remember_roles
+from .hash_pool import get_hash_pool, HashPoolSaturated
+from .catalog import get_catalog_summary, get_catalog_version, summarize_vehicles
+from .facets import build_facets
+from .http_cache import (
+    catalog_api_etag, catalog_last_modified, catalog_page_etag,
+    dealers_api_etag, dealers_page_etag, public_conditional,
+)
+from .search import search_catalog
+from .suggest import suggest_vehicle_names
+from .pagination import InvalidCursor, get_page_size, paginate_queryset, row_sort_key
+from .instrumentation import auth_metrics, instrument_login, set_outcome
+from .dbcache import get_sweeper_stats
 from .models import Vehicle, Dealer, Purchase
+from .purchases import OutOfStock, place_purchase
 #API
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from .serializers import PurchaseSerializer, VehicleSerializer, DealerSerializer
+from .serializers import PurchaseSerializer, VehicleValuesSerializer, DealerValuesSerializer
 
 import requests
 import json
@@ -24,6 +41,7 @@ from django.views.decorators.csrf import csrf_exempt
 @csrf_protect
 @csrf_protect
 @csrf_protect
+@instrument_login
 def login_view(request):
     """
     View de login com sistema de bloqueio por tentativas - CORRIGIDA
@@ -31,6 +49,7 @@ def login_view(request):
     
     if request.user.is_authenticated:
         messages.info(request, 'Você já está logado.')
+        get_request_roles(request)  # Carrega os papéis da sessão no request.user
         response = HttpResponseRedirect(get_redirect_url(request.user))
         set_secure_headers(response)
         return response
@@ -38,20 +57,23 @@ def login_view(request):
     if request.method == 'POST':
         form = CustomAuthenticationForm(request, data=request.POST)
         
-        if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-        else:
-            username = request.POST.get('username', '')
-            password = request.POST.get('password', '')
+        # Username do POST: limite de taxa e bloqueio são verificados antes do
+        # form.is_valid(), que já autentica (bcrypt)
+        username = request.POST.get('username', '').strip()
         
+        # Limite de taxa em memória: rajadas são recusadas sem tocar no banco
+        rate_status = get_rate_limiter().check_login(request, username)
+        if rate_status['limited']:
+            return _rate_limited_response(request, rate_status)
+        
+        lockout = get_lockout_engine()
         
         # AGORA VERIFICA O BLOQUEIO ANTES DE TUDO
         if username:  # Só verifica bloqueio se tem username
-            lock_status = is_account_locked(request, username)
-            #print(f"🎯 [DEBUG] Status do bloqueio: {lock_status}")
+            lock_status = lockout.check(request, username)
             
             if lock_status['locked']:
+                set_outcome('locked')
                 messages.error(request, lock_status['message'])
                 form = CustomAuthenticationForm()  
                 return render(request, 'authentication/login.html', {
@@ -62,14 +84,16 @@ def login_view(request):
         
         # Só agora valida o formulário completo
         if form.is_valid():
-            user = authenticate(request, username=username, password=password)
+            # O form já autenticou no clean() - reutiliza o usuário em vez de rodar o bcrypt de novo
+            user = form.get_user()
             
             if user is not None:
                 # **LOGIN BEM-SUCEDIDO - Reseta tentativas**
-                reset_login_attempts(request, username)
+                lockout.reset(request, username)
                 
                 request.session.cycle_key()
                 login(request, user)
+                remember_roles(request, user)
                 
                 messages.success(request, f'Login realizado com sucesso! Bem-vindo, {user.username}.')
                 
@@ -78,13 +102,10 @@ def login_view(request):
                 set_secure_headers(response)
                 return response
             else:
-                # **LOGIN FALHOU - Incrementa tentativas**
-                attempt_info = increment_login_attempts(request, username)
-                remaining_attempts = get_remaining_attempts(request, username)
-                
+                # **LOGIN FALHOU - Incrementa tentativas (já retorna o novo estado de bloqueio)**
+                lock_status = lockout.register_failure(request, username)
+                remaining_attempts = lock_status['remaining_attempts']
                 
-                # VERIFICA BLOQUEIO NOVAMENTE APÓS INCREMENTAR
-                lock_status = is_account_locked(request, username)
                 if lock_status['locked']:
                     messages.error(request, lock_status['message'])
                     return render(request, 'authentication/login.html', {
@@ -100,12 +121,11 @@ def login_view(request):
                 
                 form.add_error(None, 'Credenciais inválidas')
         else:
-            username = request.POST.get('username', '')
+            # Mesmo username normalizado usado em check(): espaços não escapam do bloqueio
             if username:
-                attempt_info = increment_login_attempts(request, username)
-                remaining_attempts = get_remaining_attempts(request, username)
+                lock_status = lockout.register_failure(request, username)
+                remaining_attempts = lock_status['remaining_attempts']
                 
-                lock_status = is_account_locked(request, username)
                 if lock_status['locked']:
                     messages.error(request, lock_status['message'])
                     form = CustomAuthenticationForm()  
@@ -127,6 +147,120 @@ def login_view(request):
         'account_locked': False
     })
 
+def _rate_limited_response(request, rate_status):
+    """
+    Resposta 429 para tentativas barradas pelo limitador de taxa
+    """
+    set_outcome('rate_limited')
+    messages.error(request, rate_status['message'])
+    response = render(request, 'authentication/login.html', {
+        'form': CustomAuthenticationForm(),
+        'account_locked': True,
+        'lock_message': rate_status['message']
+    }, status=429)
+    response['Retry-After'] = str(rate_status['retry_after'])
+    set_secure_headers(response)
+    return response
+
+def _failed_login_response(request, username):
+    """
+    Registra a tentativa falha e monta a resposta do login (variante assíncrona)
+    """
+    form = CustomAuthenticationForm(initial={'username': username})
+    
+    if not username:
+        messages.error(request, 'Por favor, corrija os erros no formulário.')
+        return render(request, 'authentication/login.html', {
+            'form': form,
+            'account_locked': False
+        })
+    
+    lock_status = get_lockout_engine().register_failure(request, username)
+    remaining_attempts = lock_status['remaining_attempts']
+    
+    if lock_status['locked']:
+        messages.error(request, lock_status['message'])
+        return render(request, 'authentication/login.html', {
+            'form': form,
+            'account_locked': True,
+            'lock_message': lock_status['message']
+        })
+    
+    if remaining_attempts <= 3:
+        messages.warning(request, f'Credenciais inválidas. {remaining_attempts} tentativa(s) restante(s) antes do bloqueio.')
+    else:
+        messages.error(request, 'Credenciais inválidas. Verifique seu usuário e senha.')
+    
+    return render(request, 'authentication/login.html', {
+        'form': form,
+        'account_locked': False
+    })
+
+@csrf_protect
+@instrument_login
+async def login_view_async(request):
+    """
+    Variante assíncrona do login para ASGI - o bcrypt roda no pool limitado
+    e o event loop continua atendendo o catálogo enquanto os hashes executam
+    """
+    user = await request.auser()
+    if user.is_authenticated or request.method != 'POST':
+        return await sync_to_async(login_view)(request)
+    
+    username = request.POST.get('username', '').strip()
+    password = request.POST.get('password', '')
+    
+    rate_status = await sync_to_async(get_rate_limiter().check_login)(request, username)
+    if rate_status['limited']:
+        return await sync_to_async(_rate_limited_response)(request, rate_status)
+    
+    if username:
+        lock_status = await sync_to_async(get_lockout_engine().check)(request, username)
+        if lock_status['locked']:
+            set_outcome('locked')
+            messages.error(request, lock_status['message'])
+            return await sync_to_async(render)(request, 'authentication/login.html', {
+                'form': CustomAuthenticationForm(),
+                'account_locked': True,
+                'lock_message': lock_status['message']
+            })
+    
+    user = None
+    if username and password:
+        try:
+            # Só o CustomAuthBackend: o ModelBackend (fallback de aauthenticate) faria
+            # o bcrypt no event loop, fora do pool limitado
+            user = await CustomAuthBackend().aauthenticate(request, username=username, password=password)
+        except HashPoolSaturated:
+            # Fila de hash cheia: recusa sem contar como tentativa falha
+            set_outcome('busy')
+            messages.error(request, 'Servidor ocupado. Tente novamente em alguns segundos.')
+            response = await sync_to_async(render)(request, 'authentication/login.html', {
+                'form': CustomAuthenticationForm(initial={'username': username}),
+                'account_locked': False
+            }, status=503)
+            response['Retry-After'] = '5'
+            set_secure_headers(response)
+            return response
+    
+    if user is None:
+        return await sync_to_async(_failed_login_response)(request, username)
+    user.backend = 'authentication.backends.CustomAuthBackend'
+    
+    await sync_to_async(get_lockout_engine().reset)(request, username)
+    
+    await request.session.acycle_key()
+    await alogin(request, user)
+    # Lê as versões de papéis no cache (DatabaseCache): fora do event loop
+    await sync_to_async(remember_roles)(request, user)
+    
+    messages.success(request, f'Login realizado com sucesso! Bem-vindo, {user.username}.')
+    
+    redirect_url = await sync_to_async(get_redirect_url)(user, request.GET.get('next'))
+    response = HttpResponseRedirect(redirect_url)
+    set_secure_headers(response)
+    return response
+
 def logout_view(request):
     """
     View de logout com limpeza segura da sessão e mensagem
@@ -152,20 +286,23 @@ def get_redirect_url(user, next_url=None):
     if next_url and next_url.startswith('/'):
         return next_url
     
-    if user.groups.filter(name='Admin').exists():
+    roles = get_user_roles(user)
+    if 'Admin' in roles:
         return '/admincar/dashboard/'
-    elif user.groups.filter(name='Dealer').exists():
+    elif 'Dealer' in roles:
         return '/dealer/dashboard/'
     else:
         return '/dashboard/'
 
-def set_secure_headers(response):
+def set_secure_headers(response, cacheable=False):
     """
-    Configura cabeçalhos de segurança HTTP
+    Configura cabeçalhos de segurança HTTP. Páginas públicas (cacheable=True)
+    não recebem no-store - a política de cache vem de public_conditional.
     """
-    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response['Pragma'] = 'no-cache'
-    response['Expires'] = '0'
+    if not cacheable:
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        response['Pragma'] = 'no-cache'
+        response['Expires'] = '0'
     response['X-Content-Type-Options'] = 'nosniff'
     response['X-Frame-Options'] = 'DENY'
     response['X-XSS-Protection'] = '1; mode=block'
@@ -185,6 +322,7 @@ def dashboard_view(request):
         return response
     
     messages.info(request, 'Redirecionando para seu dashboard...')
+    get_request_roles(request)  # Carrega os papéis da sessão no request.user
     return redirect(get_redirect_url(request.user))
 
 @admin_required
@@ -198,7 +336,7 @@ def admin_dashboard(request):
     
     context = {
         'user': request.user,
-        'user_groups': list(request.user.groups.values_list('name', flat=True)),
+        'user_groups': sorted(get_request_roles(request)),
         'session_key': request.session.session_key[:10] + '...' if request.session.session_key else 'None'
     }
     
@@ -217,7 +355,7 @@ def dealer_dashboard(request):
     
     context = {
         'user': request.user,
-        'user_groups': list(request.user.groups.values_list('name', flat=True)),
+        'user_groups': sorted(get_request_roles(request)),
         'session_key': request.session.session_key[:10] + '...' if request.session.session_key else 'None'
     }
     
@@ -251,30 +389,42 @@ def home_view(request):
     set_secure_headers(response)
     return response
 
+def _catalog_page_context(request):
+    """
+    Página do catálogo (?cursor=, ?page_size=) agrupada por marca, com os totais
+    do catálogo inteiro. Só a página é lida do banco (seek no índice
+    brand, name, id). Cursor inválido volta para a primeira página.
+    """
+    summary = get_catalog_summary()
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor')
+    try:
+        vehicles, next_cursor = paginate_queryset(Vehicle.objects.all(), cursor, page_size)
+    except InvalidCursor:
+        cursor = None
+        vehicles, next_cursor = paginate_queryset(Vehicle.objects.all(), None, page_size)
+    
+    return {
+        'vehicles': vehicles,
+        'vehicles_by_brand': summarize_vehicles(vehicles)['vehicles_by_brand'],
+        'total_vehicles': summary['total_vehicles'],
+        'total_available': summary['total_available'],
+        'catalog_version': summary['version'],
+        'cursor': cursor,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+    }
+
 @dealer_required
 def dealer_vehicles(request):
     """
     View para listar veículos disponíveis para dealers
     """
-    vehicles = Vehicle.objects.all().order_by('brand', 'name')
-    
-    # Estatísticas
-    total_vehicles = vehicles.count()
-    total_available = sum(vehicle.quantity_available for vehicle in vehicles)
-    
-    # Agrupar por marca para o template
-    vehicles_by_brand = {}
-    for vehicle in vehicles:
-        if vehicle.brand not in vehicles_by_brand:
-            vehicles_by_brand[vehicle.brand] = []
-        vehicles_by_brand[vehicle.brand].append(vehicle)
-    
+    # Página do banco; totais e facetas do resumo versionado do catálogo
     context = {
         'user': request.user,
-        'vehicles': vehicles,
-        'vehicles_by_brand': vehicles_by_brand,
-        'total_vehicles': total_vehicles,
-        'total_available': total_available,
+        **_catalog_page_context(request),
+        'facets': build_facets(get_catalog_summary()['facet_cells']),
     }
     
     response = render(request, 'authentication/vehicles.html', context)
@@ -286,47 +436,32 @@ def search_vehicles(request):
     """
     View para pesquisa de veículos por dealers
     """
-    vehicles = Vehicle.objects.all().order_by('brand', 'name')
-    
     # Obter parâmetros de pesquisa
     search_name = request.GET.get('name', '').strip()
     search_brand = request.GET.get('brand', '').strip()
     search_body_type = request.GET.get('body_type', '').strip()
     
-    # Aplicar filtros
-    if search_name:
-        vehicles = vehicles.filter(name__icontains=search_name)
-    
-    if search_brand and search_brand != 'ALL':
-        vehicles = vehicles.filter(brand=search_brand)
-    
-    if search_body_type and search_body_type != 'ALL':
-        vehicles = vehicles.filter(body_type=search_body_type)
+    # Busca indexada e ranqueada (FULLTEXT no MySQL, trigramas nos demais bancos)
+    # com as contagens por marca e carroceria para os filtros
+    vehicles, facets = search_catalog(
+        search_name,
+        brand=search_brand if search_brand != 'ALL' else None,
+        body_type=search_body_type if search_body_type != 'ALL' else None,
+        with_facets=True,
+    )
     
     # Verificar se é uma pesquisa
     is_search = any([search_name, search_brand != 'ALL', search_body_type != 'ALL'])
     
-    # Estatísticas
-    total_vehicles = vehicles.count()
-    total_available = sum(vehicle.quantity_available for vehicle in vehicles)
-    
-    # Agrupar por marca para o template
-    vehicles_by_brand = {}
-    for vehicle in vehicles:
-        if vehicle.brand not in vehicles_by_brand:
-            vehicles_by_brand[vehicle.brand] = []
-        vehicles_by_brand[vehicle.brand].append(vehicle)
-    
     context = {
         'user': request.user,
-        'vehicles': vehicles,
-        'vehicles_by_brand': vehicles_by_brand,
-        'total_vehicles': total_vehicles,
-        'total_available': total_available,
+        **summarize_vehicles(vehicles),
         'is_search': is_search,
         'search_name': search_name,
         'search_brand': search_brand,
         'search_body_type': search_body_type,
+        'facets': facets,
+        'catalog_version': get_catalog_version(),
         'brand_choices': Vehicle.BRAND_CHOICES,
         'body_type_choices': Vehicle.BODY_TYPE_CHOICES,
     }
@@ -335,6 +470,7 @@ def search_vehicles(request):
     set_secure_headers(response)
     return response
 
+@public_conditional(dealers_page_etag)
 def public_dealers(request):
     """
     Página pública com lista de dealers disponíveis
@@ -347,37 +483,23 @@ def public_dealers(request):
     }
     
     response = render(request, 'authentication/public_dealers.html', context)
-    set_secure_headers(response)
+    set_secure_headers(response, cacheable=True)
     return response
 
+@public_conditional(catalog_page_etag, catalog_last_modified)
 def public_dealer_vehicles(request, dealer_id):
     """
     Página pública com veículos disponíveis de um dealer específico
     """
     dealer = get_object_or_404(Dealer, dealer_id=dealer_id, is_public=True)
-    vehicles = Vehicle.objects.all().order_by('brand', 'name')
-    
-    # Estatísticas
-    total_vehicles = vehicles.count()
-    total_available = sum(vehicle.quantity_available for vehicle in vehicles)
-    
-    # Agrupar por marca para o template
-    vehicles_by_brand = {}
-    for vehicle in vehicles:
-        if vehicle.brand not in vehicles_by_brand:
-            vehicles_by_brand[vehicle.brand] = []
-        vehicles_by_brand[vehicle.brand].append(vehicle)
     
     context = {
         'dealer': dealer,
-        'vehicles': vehicles,
-        'vehicles_by_brand': vehicles_by_brand,
-        'total_vehicles': total_vehicles,
-        'total_available': total_available,
+        **_catalog_page_context(request),
     }
     
     response = render(request, 'authentication/public_vehicles.html', context)
-    set_secure_headers(response)
+    set_secure_headers(response, cacheable=True)
     return response
 
 def purchase_vehicle(request, dealer_id, vehicle_id):
@@ -396,15 +518,11 @@ def purchase_vehicle(request, dealer_id, vehicle_id):
         form = PurchaseForm(request.POST)
         if form.is_valid():
             try:
-                # Criar a compra
+                # Criar a compra e reduzir o estoque na mesma transação (UPDATE condicional)
                 purchase = form.save(commit=False)
                 purchase.vehicle = vehicle
                 purchase.dealer = dealer
-                purchase.save()
-                
-                # Reduzir a quantidade disponível do veículo
-                vehicle.quantity_available -= 1
-                vehicle.save()
+                place_purchase(purchase)
                 
                 messages.success(
                     request, 
@@ -414,6 +532,10 @@ def purchase_vehicle(request, dealer_id, vehicle_id):
                 # Redirecionar para página de confirmação
                 return redirect('purchase_success', purchase_code=purchase.purchase_code)
                 
+            except OutOfStock as e:
+                # Outro comprador levou a última unidade depois da verificação acima
+                messages.error(request, str(e))
+                return redirect('public_dealer_vehicles', dealer_id=dealer.dealer_id)
             except Exception as e:
                 messages.error(request, f'Erro ao processar compra: {str(e)}')
         else:
@@ -445,61 +567,57 @@ def purchase_success(request, purchase_code):
     set_secure_headers(response)
     return response
 
+@public_conditional(catalog_page_etag, catalog_last_modified)
 def public_all_vehicles(request):
     """
     Página pública com todos os veículos disponíveis (sem dealer específico)
     """
-    vehicles = Vehicle.objects.all().order_by('brand', 'name')
-    
-    # Estatísticas
-    total_vehicles = vehicles.count()
-    total_available = sum(vehicle.quantity_available for vehicle in vehicles)
-    
-    # Agrupar por marca para o template
-    vehicles_by_brand = {}
-    for vehicle in vehicles:
-        if vehicle.brand not in vehicles_by_brand:
-            vehicles_by_brand[vehicle.brand] = []
-        vehicles_by_brand[vehicle.brand].append(vehicle)
-    
-    context = {
-        'vehicles': vehicles,
-        'vehicles_by_brand': vehicles_by_brand,
-        'total_vehicles': total_vehicles,
-        'total_available': total_available,
-    }
+    context = _catalog_page_context(request)
     
     response = render(request, 'authentication/public_vehicles.html', context)
-    set_secure_headers(response)
+    set_secure_headers(response, cacheable=True)
     return response
 
 #APIs
 # API para listar dealers públicos
+@public_conditional(dealers_api_etag, per_user=False)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_public_dealers(request):
     """
     API para listar concessionárias públicas
     """
-    dealers = Dealer.objects.filter(is_public=True).order_by('dealer_name')
-    serializer = DealerSerializer(dealers, many=True)
+    # Uma única query: a contagem sai da própria lista
+    dealers = DealerValuesSerializer(
+        DealerValuesSerializer.values(Dealer.objects.filter(is_public=True).order_by('dealer_name'))
+    ).data
     return Response({
-        'count': dealers.count(),
-        'dealers': serializer.data
+        'count': len(dealers),
+        'dealers': dealers
     })
 
 # API para listar veículos públicos
+@public_conditional(catalog_api_etag, per_user=False)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_public_vehicles(request):
     """
-    API para listar veículos disponíveis
+    API para listar veículos disponíveis, paginada por cursor (?cursor=, ?page_size=).
+    'count' é o total de veículos disponíveis (do resumo do catálogo) e 'page_count'
+    o número de veículos da página; next_cursor é None na última página.
     """
-    vehicles = Vehicle.objects.filter(quantity_available__gt=0).order_by('brand', 'name')
-    serializer = VehicleSerializer(vehicles, many=True)
+    rows = VehicleValuesSerializer.values(Vehicle.objects.filter(quantity_available__gt=0))
+    try:
+        rows, next_cursor = paginate_queryset(rows, request.GET.get('cursor'), get_page_size(request), key=row_sort_key)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    vehicles = VehicleValuesSerializer(rows).data
     return Response({
-        'count': vehicles.count(),
-        'vehicles': serializer.data
+        'count': get_catalog_summary()['vehicles_in_stock'],
+        'page_count': len(vehicles),
+        'vehicles': vehicles,
+        'next_cursor': next_cursor,
     })
 
 # API para realizar compra
@@ -522,6 +640,11 @@ def api_purchase_vehicle(request):
                 'customer_name': purchase.customer_name
             }, status=status.HTTP_201_CREATED)
             
+        except OutOfStock as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({
                 'success': False,
@@ -562,7 +685,7 @@ def api_dealer_stats(request):
     """
     API para estatísticas do dealer (requer autenticação)
     """
-    if not request.user.groups.filter(name='Dealer').exists():
+    if not has_role(request, 'Dealer'):
         return Response({
             'error': 'Acesso negado. Apenas dealers podem acessar esta API.'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -579,6 +702,83 @@ def api_dealer_stats(request):
         'user': request.user.username
     })
 
+# API de sugestões para o campo de nome da pesquisa
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def api_vehicle_suggest(request):
+    """
+    API com nomes de veículos que começam pelo texto digitado (?q=, ?limit=),
+    respondida pelo índice em memória, sem acessar o banco
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', 0))
+    except ValueError:
+        limit = 0
+    return Response({
+        'query': query,
+        'suggestions': suggest_vehicle_names(query, limit) if query else [],
+    })
+
+# API com as facetas da pesquisa de veículos
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_vehicle_facets(request):
+    """
+    API com contagens e unidades disponíveis por marca e por carroceria para
+    a pesquisa (?name=, ?brand=, ?body_type=) - apenas dealers
+    """
+    if not has_role(request, 'Dealer'):
+        return Response({
+            'error': 'Acesso negado. Apenas dealers podem acessar esta API.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    search_brand = request.GET.get('brand', '').strip()
+    search_body_type = request.GET.get('body_type', '').strip()
+    vehicles, facets = search_catalog(
+        request.GET.get('name', '').strip(),
+        brand=search_brand if search_brand not in ('', 'ALL') else None,
+        body_type=search_body_type if search_body_type not in ('', 'ALL') else None,
+        with_facets=True,
+    )
+    return Response({
+        'total_vehicles': len(vehicles),
+        'total_available': sum(vehicle.quantity_available for vehicle in vehicles),
+        'facets': facets,
+    })
+
+# API para monitorar o pool de hash do login assíncrono
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_hash_pool_stats(request):
+    """
+    API com profundidade da fila e contadores do pool de bcrypt (apenas admins)
+    """
+    if not has_role(request, 'Admin'):
+        return Response({
+            'error': 'Acesso negado. Apenas administradores podem acessar esta API.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response(get_hash_pool().stats())
+
+# Métricas agregadas do login (instrumentation.py) para coleta periódica
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_auth_metrics(request):
+    """
+    API com tempos por etapa e resultados do login deste processo (apenas admins)
+    """
+    if not has_role(request, 'Admin'):
+        return Response({
+            'error': 'Acesso negado. Apenas administradores podem acessar esta API.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({
+        'auth': auth_metrics.snapshot(),
+        'hash_pool': get_hash_pool().stats(),
+        'cache_sweeper': get_sweeper_stats(),
+    })
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @csrf_exempt
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'web_project.settings')
+# Sob ASGI o login usa a view assíncrona (bcrypt no pool limitado)
+os.environ.setdefault('DJANGO_ASYNC_LOGIN', '1')
 
 application = get_asgi_application()
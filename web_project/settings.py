@@ -159,6 +159,80 @@ AUTHENTICATION_BACKENDS = [
 
 AUTH_USER_MODEL = 'authentication.CustomUser'
 
+# Guarda os grupos do usuário na sessão (regravados a cada login)
+ROLE_SESSION_CACHE = True
+# Segundos que as versões de papéis valem no processo (atraso máximo entre workers)
+ROLE_VERSIONS_LOCAL_TTL = 5
+
+# Snapshot do usuário autenticado em LRU local + cache compartilhado (get_user)
+AUTH_USER_CACHE = {
+    'LOCAL_TTL': 5,
+    'TTL': 60,
+    'MAX_ENTRIES': 1024,
+    'SHARED': True,  # Só vale com um cache que não seja o DatabaseCache (ex.: Redis)
+}
+
+# Snapshot versionado do catálogo de veículos (catalog.py)
+CATALOG_CACHE = {
+    'TTL': 3600,  # Segundos de cada versão do snapshot no cache
+}
+
+# Paginação por cursor das listagens e da API de veículos (pagination.py)
+CATALOG_PAGINATION = {
+    'PAGE_SIZE': 24,
+    'MAX_PAGE_SIZE': 100,
+}
+
+# Busca de veículos (search.py): FULLTEXT no MySQL, trigramas em memória nos demais
+VEHICLE_SEARCH = {
+    'BACKEND': 'auto',
+    'MIN_SIMILARITY': 0.5,
+}
+
+# Sugestões de nome de veículo (suggest.py)
+VEHICLE_SUGGEST = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 50,
+    'REFRESH_INTERVAL': 30,  # Segundos entre verificações da versão do catálogo
+}
+
+# Páginas e APIs públicas: ETag/Last-Modified e Cache-Control público (http_cache.py)
+PUBLIC_CACHE = {
+    'MAX_AGE': 0,  # Segundos sem revalidar; 0 = navegador/proxy sempre revalidam (304)
+    'IMMUTABLE_MAX_AGE': 31536000,  # Imagens endereçadas por conteúdo (1 ano, immutable)
+}
+
+# Rendições redimensionadas de Vehicle.image (renditions.py)
+VEHICLE_IMAGE_RENDITIONS = {
+    'WIDTHS': [320, 640, 960],
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+}
+
+# Eventos de tempo do login (lookup, bcrypt, group_sync, lockout) - fração amostrada
+AUTH_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.environ.get('DJANGO_AUTH_SAMPLE_RATE', '0.1')),
+}
+
+# O handler do logger 'authentication.auth' é colocado atrás de uma fila
+# (instrumentation.install_queue_logging) para não bloquear o request
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'auth_console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'authentication.auth': {
+            'handlers': ['auth_console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # Configurações de templates
 import os
 TEMPLATES = [
@@ -172,6 +246,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'authentication.context_processors.roles',
             ],
         },
     },
@@ -200,10 +275,24 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.Argon2PasswordHasher',
 ]
 
+# Custo bcrypt das senhas de Admin/Dealer - calibre com "manage.py calibrate_bcrypt".
+# Hashes com outro custo são regravados automaticamente no próximo login.
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
 # Configurações de arquivos de mídia
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Vehicle.image: arquivos nomeados pelo SHA-256 do conteúdo (sem cópias duplicadas)
+    'vehicle_images': {
+        'BACKEND': 'authentication.storage.ContentAddressedStorage',
+        'OPTIONS': {'directory': 'vehicles'},
+    },
+}
+
 # Configurações de segurança - Bloqueio por tentativas
 LOGIN_SECURITY_CONFIG = {
     'MAX_LOGIN_ATTEMPTS': 5,  # Número máximo de tentativas
@@ -212,12 +301,63 @@ LOGIN_SECURITY_CONFIG = {
     'IP_LOCKOUT_TIME': 1800,  # 30 minutos para IP
 }
 
+# Limite de taxa (GCRA) das tentativas de login, aplicado antes do banco.
+# STORE: LocalMemoryStore (um worker), SharedMemoryStore (vários workers no
+# mesmo host, via mmap) ou CacheStore (cache do Django, fallback)
+LOGIN_RATE_LIMIT = {
+    'STORE': 'authentication.ratelimit.LocalMemoryStore',
+    'OPTIONS': {'max_entries': 10000},
+    'USER_RATE': (5, 60),  # 5 tentativas por minuto por usuário+IP
+    'IP_RATE': (20, 60),  # 20 tentativas por minuto por IP
+}
+
+# Códigos de compra (purchase_codes.py): sequência reservada em blocos + permutação.
+# KEY embaralha os códigos - não altere depois que houver compras
+PURCHASE_CODES = {
+    'BLOCK_SIZE': 100,  # Números reservados por processo a cada UPDATE na sequência
+    # Segredo das rodadas HMAC (obrigatório, diferente da SECRET_KEY) - gere com
+    # python -c "import secrets; print(secrets.token_urlsafe(32))"
+    'KEY': os.environ.get('PURCHASE_CODE_KEY'),
+}
+
+# Login assíncrono (ASGI): bcrypt executado em pool limitado
+# web_project/asgi.py define DJANGO_ASYNC_LOGIN=1 para usar a view assíncrona
+ASYNC_LOGIN = os.environ.get('DJANGO_ASYNC_LOGIN') == '1'
+LOGIN_HASH_POOL = {
+    'MAX_WORKERS': min(4, os.cpu_count() or 1),  # Hashes bcrypt simultâneos
+    'MAX_PENDING': 32,  # Logins aguardando na fila antes de responder 503
+}
+
 # Configurações de cache para bloqueio (usando database cache como fallback)
+# INLINE_CULL=False evita o cull (DELETEs) dentro do set(); as entradas
+# expiradas são removidas pelo sweeper (thread abaixo ou "manage.py purge_login_cache")
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'BACKEND': 'authentication.dbcache.SweptDatabaseCache',
         'LOCATION': 'login_security_cache',
-    }
+        'OPTIONS': {
+            'INLINE_CULL': False,
+        },
+    },
+    # HTML das seções de marca das listagens ({% cache %}), por processo.
+    # As chaves incluem a versão do catálogo, então não precisam ser invalidadas.
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog-fragments',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
+# Varredura periódica de login_security_cache e login_attempt_counters.
+# Prefira o comando purge_login_cache no cron; com ENABLED cada processo que
+# atende requisições roda a própria thread (iniciada na primeira requisição)
+LOGIN_CACHE_SWEEPER = {
+    'ENABLED': False,
+    'INTERVAL': 300,  # Segundos entre varreduras
+    'BATCH_SIZE': 1000,  # Linhas por DELETE
 }
 
 REST_FRAMEWORK = {
@@ -15,15 +15,30 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+import re
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from authentication.http_cache import serve_immutable_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('authentication.urls')),
 ]
 
-# Servir arquivos de mídia durante o desenvolvimento
+# Servir arquivos de mídia durante o desenvolvimento. Em produção o servidor
+# web serve MEDIA_ROOT e aplica o mesmo cache imutável às imagens endereçadas
+# por conteúdo, por exemplo no nginx:
+#   location ~ ^/media/vehicles/[0-9a-f]{64}\.[a-z0-9]+$ {
+#       root /caminho/do/projeto;
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>vehicles/[0-9a-f]{64}\.[a-z0-9]+)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            serve_immutable_media,
+            name='immutable_media',
+        ),
+    ]
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)